@@ -1,15 +1,5 @@
 from __future__ import annotations as _annotations
 
-import asyncio
-import random
-import uuid
-
-from pydantic import BaseModel
-
-from dotenv import load_dotenv
-import os
-import agentops
-
 from agents import (
     Agent,
     HandoffOutputItem,
@@ -33,10 +23,10 @@ from context import AgentContext
 @function_tool()
 async def general_info_lookup_tool(context: RunContextWrapper[AgentContext], question: str) -> str:
     """
-    Get the most update to date disaster relief info
+    Get the most update to date disaster relief info relevant to the question
     """
-    return context.context.disaster_info
-    
+    return context.context.news_index.lookup(question)
+
 
 faq_agent = Agent[AgentContext](
     name="General Info Agent",
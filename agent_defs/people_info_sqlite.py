@@ -0,0 +1,271 @@
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Union
+
+from .people_info_agg import ConversationRef, EmergencyCase, EmergencyResponseSystem
+from .responder_pool import ResponderPool
+from .transcripts import SegmentedTranscriptLog, TranscriptWriter
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cases (
+    conversation_id INTEGER PRIMARY KEY,
+    injury_type TEXT NOT NULL,
+    caller_name TEXT NOT NULL,
+    first_responders_demanded TEXT NOT NULL,
+    need_severity INTEGER NOT NULL,
+    closed INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cases_open_by_severity ON cases (closed, need_severity);
+CREATE INDEX IF NOT EXISTS cases_by_severity ON cases (need_severity);
+CREATE TABLE IF NOT EXISTS conversations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    conversation_id INTEGER NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS conversations_by_case ON conversations (conversation_id, id);
+"""
+
+_CASE_COLUMNS = (
+    "conversation_id",
+    "injury_type",
+    "caller_name",
+    "first_responders_demanded",
+    "need_severity",
+    "closed",
+)
+
+
+class _SQLiteConversationStore:
+    """Conversation store over the ``conversations`` table"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+
+    def write(self, conversation_id: int, text: str, header: Optional[str] = None):
+        self._conn.execute(
+            "INSERT INTO conversations (conversation_id, text) VALUES (?, ?)",
+            (conversation_id, text),
+        )
+
+    def reset(self, conversation_id: int):
+        self._conn.execute("DELETE FROM conversations WHERE conversation_id = ?", (conversation_id,))
+
+    def read(self, conversation_id: int) -> str:
+        rows = self._conn.execute(
+            "SELECT text FROM conversations WHERE conversation_id = ? ORDER BY id",
+            (conversation_id,),
+        )
+        return "\n".join(text for (text,) in rows)
+
+    def __contains__(self, conversation_id: int) -> bool:
+        row = self._conn.execute(
+            "SELECT 1 FROM conversations WHERE conversation_id = ? LIMIT 1",
+            (conversation_id,),
+        ).fetchone()
+        return row is not None
+
+    def close(self):
+        pass
+
+
+class SQLiteEmergencyResponseSystem(EmergencyResponseSystem):
+    """
+    EmergencyResponseSystem stored in an SQLite database in WAL mode.
+
+    Case fields live in the ``cases`` table and each conversation line is a row
+    in the ``conversations`` table, so a mutation touches only the rows it
+    changes and other processes can read while a writer is active. Only open
+    cases are loaded at startup, without their conversations; closed cases are
+    read on demand by get_case_by_id. ``cases`` therefore holds the cases
+    loaded so far.
+    """
+
+    def __init__(
+        self,
+        data_file="emergency_data.db",
+        fsync: bool = False,
+        transcripts: Optional[Union[TranscriptWriter, SegmentedTranscriptLog]] = None,
+        responder_pool: Optional[ResponderPool] = None,
+    ):
+        super().__init__(data_file, fsync=fsync, transcripts=transcripts, responder_pool=responder_pool)
+
+    def _load_data(self) -> List[EmergencyCase]:
+        # Autocommit mode, transaction() issues BEGIN/COMMIT explicitly
+        self._conn = sqlite3.connect(self.data_file, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA synchronous={'FULL' if self.fsync else 'NORMAL'}")
+        self._conn.executescript(_SCHEMA)
+        self.conversations = _SQLiteConversationStore(self._conn)
+        return self._load_open_cases()
+
+    def _load_open_cases(self) -> List[EmergencyCase]:
+        self._reset_indexes()
+        rows = self._conn.execute(
+            f"SELECT {', '.join(_CASE_COLUMNS)} FROM cases WHERE closed = 0 ORDER BY conversation_id"
+        ).fetchall()
+        for row in rows:
+            self._add(self._row_to_case(row))
+
+        (max_id,) = self._conn.execute("SELECT MAX(conversation_id) FROM cases").fetchone()
+        self._max_id = max_id or 0
+        return self.cases
+
+    @staticmethod
+    def _row_to_case(row) -> EmergencyCase:
+        conversation_id, injury_type, caller_name, responders, need_severity, closed = row
+        return EmergencyCase(
+            injury_type=injury_type,
+            caller_name=caller_name,
+            first_responders_demanded=json.loads(responders),
+            conversation_id=conversation_id,
+            need_severity=need_severity,
+            closed=bool(closed),
+            conversation=ConversationRef(conversation_id),
+        )
+
+    def get_case_by_id(self, conversation_id: int) -> Optional[EmergencyCase]:
+        case = self._by_id.get(conversation_id)
+        if case is not None:
+            return case
+
+        row = self._conn.execute(
+            f"SELECT {', '.join(_CASE_COLUMNS)} FROM cases WHERE conversation_id = ?",
+            (conversation_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        case = self._row_to_case(row)
+        self._add(case)
+        return case
+
+    def _persist(self, record: Dict):
+        with self.transaction():
+            op = record["op"]
+            if op == "add":
+                self._insert_case(record["case"])
+            elif op == "set":
+                self._update_case(record["id"], record["fields"])
+
+    def _insert_case(self, case: Dict):
+        self._conn.execute(
+            f"INSERT INTO cases ({', '.join(_CASE_COLUMNS)}) VALUES ({', '.join('?' * len(_CASE_COLUMNS))})",
+            (
+                case["conversation_id"],
+                case["injury_type"],
+                case["caller_name"],
+                json.dumps(case["first_responders_demanded"]),
+                case["need_severity"],
+                int(case["closed"]),
+            ),
+        )
+
+    def _update_case(self, conversation_id: int, fields: Dict):
+        fields = dict(fields)
+        if "first_responders_demanded" in fields:
+            fields["first_responders_demanded"] = json.dumps(fields["first_responders_demanded"])
+        if "closed" in fields:
+            fields["closed"] = int(fields["closed"])
+
+        columns = [key for key in fields if key in _CASE_COLUMNS]
+        if columns:
+            self._conn.execute(
+                f"UPDATE cases SET {', '.join(f'{key} = ?' for key in columns)} WHERE conversation_id = ?",
+                [fields[key] for key in columns] + [conversation_id],
+            )
+
+    @contextmanager
+    def transaction(self):
+        """
+        Group several mutations into one SQLite transaction
+
+        If the block raises, the transaction is rolled back and the in-memory
+        indexes are reloaded from the database. Blocks may be nested.
+        """
+        if self._batch_depth:
+            self._batch_depth += 1
+            try:
+                yield self
+            finally:
+                self._batch_depth -= 1
+            return
+
+        self._batch_depth = 1
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            self._batch_depth = 0
+            self._load_open_cases()
+            raise
+        else:
+            self._conn.execute("COMMIT")
+        finally:
+            self._batch_depth = 0
+
+    def compact(self):
+        """Checkpoint the write-ahead log back into the database file"""
+        self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        self._conn.close()
+        if self.transcripts is not None:
+            self.transcripts.close()
+
+
+def test_sqlite_backend():
+    """Test that the SQLite backend persists the same updates as the JSON one"""
+    test_data_file = "test_emergency_data.db"
+    test_ids = range(201, 204)
+
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(test_data_file + suffix):
+            os.remove(test_data_file + suffix)
+
+    ers = SQLiteEmergencyResponseSystem(test_data_file)
+    with ers.transaction():
+        for conversation_id, responders in zip(test_ids, [["paramedic"], ["police"], ["firefighter"]]):
+            ers.add_case(
+                EmergencyCase(
+                    injury_type="Fall",
+                    caller_name="Test Caller",
+                    first_responders_demanded=responders,
+                    conversation_id=conversation_id,
+                    need_severity=5,
+                    closed=False,
+                    conversation="Caller: Someone fell.",
+                )
+            )
+    ers.add_to_conversation(201, "Dispatcher: Is the person conscious?")
+    ers.update_case_field(202, "need_severity", 9)
+    ers.update_responders(202, ["police", "paramedic"])
+    ers.update_case_field(203, "closed", True)
+
+    # A failed batch leaves neither the database nor the indexes changed
+    try:
+        with ers.transaction():
+            ers.update_case_field(201, "closed", True)
+            raise RuntimeError("dispatcher crashed")
+    except RuntimeError:
+        pass
+    assert not ers.get_case_by_id(201).closed
+
+    new_ers = SQLiteEmergencyResponseSystem(test_data_file)
+    assert len(new_ers.cases) == 2, "Only open cases should be loaded at startup"
+    assert new_ers.get_case_by_id(201).conversation == "Caller: Someone fell.\nDispatcher: Is the person conscious?"
+    assert new_ers.peek().conversation_id == 202
+    assert new_ers.get_case_by_id(203).closed
+    assert new_ers.count_responders_needed() == {"paramedic": 2, "police": 1}
+    assert new_ers.get_next_conversation_id() == 204
+
+    # Clean up test files
+    ers.close()
+    new_ers.close()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(test_data_file + suffix):
+            os.remove(test_data_file + suffix)
+    for conversation_id in test_ids:
+        if os.path.exists(f"conversation_{conversation_id}.txt"):
+            os.remove(f"conversation_{conversation_id}.txt")
@@ -1,15 +1,5 @@
 from __future__ import annotations as _annotations
 
-import asyncio
-import random
-import uuid
-
-from pydantic import BaseModel
-
-from dotenv import load_dotenv
-import os
-import agentops
-
 from agents import (
     Agent,
     HandoffOutputItem,
@@ -29,6 +19,7 @@ from agents.extensions.handoff_prompt import RECOMMENDED_PROMPT_PREFIX
 
 # global context
 from context import AgentContext
+from first_aid import first_aid_kb
 
 
 @function_tool()
@@ -36,7 +27,11 @@ async def medical_info_lookup_tool(context: RunContextWrapper[AgentContext], inj
     """
     Get first aid and medical guidance for specific injury situations during disasters
     """
-    return context.context.medical_info
+    # Answered locally in milliseconds; web search is only for what the articles do not cover
+    answer = first_aid_kb().lookup(injury_description)
+    if answer is None:
+        return "No first aid article matches this situation. Use web search to find guidance."
+    return answer
 
 
 personal_care_agent = Agent[AgentContext](
@@ -48,8 +43,8 @@ personal_care_agent = Agent[AgentContext](
     # Routine
     1. Assess the severity of the medical situation described by the person.
     2. For life-threatening emergencies, immediately advise seeking professional medical help if available.
-    3. Use the web search tool to find current emergency medical protocols and disaster-specific guidance.
-    4. Cross-reference information from both sources to provide the most accurate and up-to-date advice.
+    3. Use the medical info lookup tool to find first aid guidance for the situation.
+    4. Only if it finds no matching article, use the web search tool to find emergency medical protocols and disaster-specific guidance.
     5. If the situation is beyond your scope or requires immediate emergency services, transfer back to the triage agent.
     
     # Important Notes
@@ -57,6 +52,6 @@ personal_care_agent = Agent[AgentContext](
     - Be clear and concise with instructions
     - Emphasize safety for both the injured person and caregiver
     - When in doubt, recommend professional medical attention
-    - Use web search to verify current best practices and local emergency protocols""",
-    tools=[WebSearchTool(search_context_size="low")],
+    - Answer from the medical info lookup tool whenever it has guidance, web search is much slower""",
+    tools=[medical_info_lookup_tool, WebSearchTool(search_context_size="low")],
 )
@@ -1,7 +1,5 @@
 from __future__ import annotations as _annotations
 
-import asyncio
-from pydantic import BaseModel
 from agents import (
     Agent,
     RunContextWrapper,
@@ -11,35 +9,53 @@ from agents.extensions.handoff_prompt import RECOMMENDED_PROMPT_PREFIX
 
 # global context
 from context import AgentContext
+from severity import SeverityRules
 
 @function_tool()
-async def request_first_responder(context: RunContextWrapper[AgentContext], emergency_description: str) -> str:
+async def request_first_responder(
+    context: RunContextWrapper[AgentContext], emergency_description: str, responder_type: str = "paramedic"
+) -> str:
     """
-    Request a first responder for an emergency situation. Returns status of the request.
+    Request a first responder (paramedic, firefighter or police) for an emergency situation. Returns status of the request.
     """
-    if context.context.available_responders > 0:
-        context.context.available_responders -= 1
-        return f"First responder dispatched. {context.context.available_responders} responders remaining available."
+    pool = context.context.responder_pool
+    if responder_type not in pool.capacity:
+        return f"Unknown responder type {responder_type!r}. Choose one of: {', '.join(pool.capacity)}."
+
+    # The most severe emergencies are served first when responders are scarce
+    severity = SEVERITY_RULES.assess(emergency_description).severity
+    if await pool.reserve(
+        context.context.caller_id, [responder_type], severity=severity, timeout=context.context.responder_wait_seconds
+    ):
+        return f"First responder dispatched. {pool.available()} responders remaining available."
     return "NO RESPONDERS AVAILABLE - All first responders are currently deployed."
 
+@function_tool()
+async def release_first_responders(context: RunContextWrapper[AgentContext]) -> str:
+    """
+    Release the first responders dispatched to this caller once their emergency is resolved.
+    """
+    released = context.context.responder_pool.release(context.context.caller_id)
+    if not released:
+        return "No first responders are assigned to this caller."
+    return f"Released {sum(released.values())} responders. {context.context.available_responders} responders available."
+
+# Keyword rules compiled once, see severity_rules.json
+SEVERITY_RULES = SeverityRules.load()
+CRITICAL_KEYWORDS = SEVERITY_RULES.phrases("CRITICAL")
+URGENT_KEYWORDS = SEVERITY_RULES.phrases("URGENT")
+
+
+def classify_severity(situation: str) -> str:
+    """Keyword-based severity: CRITICAL, URGENT, or NON-URGENT"""
+    return SEVERITY_RULES.classify(situation)
+
 @function_tool()
 async def assess_emergency_severity(context: RunContextWrapper[AgentContext], situation: str) -> str:
     """
     Analyze the emergency situation and return severity level: CRITICAL, URGENT, or NON-URGENT
     """
-    # This would typically connect to a more sophisticated evaluation system
-    # For now, we'll use keyword-based assessment
-    critical_keywords = ["unconscious", "bleeding heavily", "not breathing", "heart attack", "stroke"]
-    urgent_keywords = ["broken", "injury", "chest pain", "difficulty breathing"]
-    
-    situation_lower = situation.lower()
-    for keyword in critical_keywords:
-        if keyword in situation_lower:
-            return "CRITICAL"
-    for keyword in urgent_keywords:
-        if keyword in situation_lower:
-            return "URGENT"
-    return "NON-URGENT"
+    return classify_severity(situation)
 
 responder_coordinator_agent = Agent[AgentContext](
     name="Responder Coordinator",
@@ -65,6 +81,7 @@ responder_coordinator_agent = Agent[AgentContext](
     # Resource Management
     - Only request first responders for genuine emergencies
     - Monitor available responder count
+    - Release first responders once the caller's emergency is resolved
     - When responders are limited, focus on most critical cases""",
-    tools=[assess_emergency_severity, request_first_responder],
+    tools=[assess_emergency_severity, request_first_responder, release_first_responders],
 )
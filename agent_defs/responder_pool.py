@@ -0,0 +1,319 @@
+import asyncio
+import bisect
+import itertools
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Hashable, Iterable, List, Optional
+
+DEFAULT_CAPACITY = {"paramedic": 2, "firefighter": 2, "police": 1}
+
+
+@dataclass
+class _Waiter:
+    holder: Hashable
+    needs: Counter
+    severity: int
+    seq: int
+    future: asyncio.Future
+    granted: bool = False
+
+    @property
+    def sort_key(self):
+        return (-self.severity, self.seq)
+
+
+class ResponderPool:
+    """
+    Typed first responders shared by every session.
+
+    Reservations are all-or-nothing and recorded per holder, usually a case's
+    conversation_id, so release() returns exactly what the holder took. A
+    request that cannot be served right away can wait: freed responders go to
+    the most severe waiting request first, and a less severe request never
+    takes a responder type that a more severe waiting one still needs.
+    Requests for types no waiting request needs are served right away.
+
+    State changes happen under a lock, so the pool can be shared between the
+    event loop and worker threads. Subclasses keeping the state elsewhere
+    override _locked() and set ``poll_interval`` so waiters also notice
+    responders freed outside this pool.
+    """
+
+    # Seconds between re-checks by waiting requests, None to rely on release() alone
+    poll_interval: Optional[float] = None
+
+    def __init__(self, capacity: Optional[Dict[str, int]] = None):
+        self.capacity = dict(DEFAULT_CAPACITY if capacity is None else capacity)
+        self._available = Counter(self.capacity)
+        self._holdings: Dict[Hashable, Counter] = {}
+        # Sorted by (-severity, arrival)
+        self._waiters: List[_Waiter] = []
+        self._waiter_keys: List[tuple] = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self):
+        """Guard a read or change of _available and _holdings"""
+        with self._lock:
+            yield
+
+    def available(self, responder_type: Optional[str] = None) -> int:
+        """Free responders of a type, or of all types"""
+        with self._locked():
+            if responder_type is None:
+                return sum(self._available.values())
+            return self._available[responder_type]
+
+    def holdings(self, holder: Hashable) -> Dict[str, int]:
+        with self._locked():
+            return dict(self._holdings.get(holder, {}))
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def _check(self, needs: Counter):
+        for responder_type, count in needs.items():
+            if count > self.capacity.get(responder_type, 0):
+                raise ValueError(f"Pool has only {self.capacity.get(responder_type, 0)} {responder_type}")
+
+    def _take(self, holder: Hashable, needs: Counter):
+        self._available -= needs
+        self._holdings.setdefault(holder, Counter()).update(needs)
+
+    def _fits(self, needs: Counter) -> bool:
+        return all(self._available[responder_type] >= count for responder_type, count in needs.items())
+
+    def _deferred(self, needs: Counter, severity: int) -> bool:
+        """Whether a waiting request at least as severe still needs one of these types"""
+        return any(
+            waiter.severity >= severity and not waiter.future.done() and not waiter.needs.keys().isdisjoint(needs)
+            for waiter in self._waiters
+        )
+
+    def try_reserve(self, holder: Hashable, responder_types: Iterable[str], severity: int = 0) -> bool:
+        """
+        Reserve responders without waiting
+
+        Args:
+            holder: Who the responders are reserved for, e.g. a conversation_id
+            responder_types: One entry per responder, e.g. ["paramedic", "police"]
+            severity: Priority against waiting requests for the same types
+
+        Returns:
+            bool: True if every responder was reserved, False if none were
+        """
+        needs = Counter(responder_types)
+        self._check(needs)
+        with self._locked():
+            # Waiting requests for the same types are served first, unless less severe
+            if not self._fits(needs) or self._deferred(needs, severity):
+                return False
+            self._take(holder, needs)
+            return True
+
+    async def reserve(
+        self,
+        holder: Hashable,
+        responder_types: Iterable[str],
+        severity: int = 0,
+        timeout: Optional[float] = None,
+    ) -> bool:
+        """
+        Reserve responders, waiting in line by severity until they are free
+
+        Args:
+            holder: Who the responders are reserved for, e.g. a conversation_id
+            responder_types: One entry per responder, e.g. ["paramedic", "police"]
+            severity: Priority in the wait queue, higher is served first
+            timeout: Seconds to wait, or None to wait until served
+
+        Returns:
+            bool: True if every responder was reserved, False on timeout
+        """
+        needs = Counter(responder_types)
+        self._check(needs)
+        loop = asyncio.get_running_loop()
+        with self._locked():
+            if self._fits(needs) and not self._deferred(needs, severity):
+                self._take(holder, needs)
+                return True
+            waiter = _Waiter(holder, needs, severity, next(self._seq), loop.create_future())
+            index = bisect.bisect(self._waiter_keys, waiter.sort_key)
+            self._waiter_keys.insert(index, waiter.sort_key)
+            self._waiters.insert(index, waiter)
+            # A more severe request may be served ahead of the waiters it overtook
+            self._grant_waiters()
+            if waiter.granted:
+                return True
+
+        try:
+            deadline = None if timeout is None else loop.time() + timeout
+            while not waiter.future.done():
+                remaining = None if deadline is None else deadline - loop.time()
+                if remaining is not None and remaining <= 0:
+                    break
+                if self.poll_interval is not None:
+                    remaining = self.poll_interval if remaining is None else min(remaining, self.poll_interval)
+                await asyncio.wait({waiter.future}, timeout=remaining)
+                if self.poll_interval is not None and not waiter.future.done():
+                    with self._locked():
+                        self._grant_waiters()
+        except asyncio.CancelledError:
+            with self._locked():
+                if waiter.granted:
+                    self._release_locked(holder, needs)
+                else:
+                    self._remove_waiter(waiter)
+            raise
+
+        with self._locked():
+            # The grant may have raced the timeout
+            if waiter.granted:
+                return True
+            self._remove_waiter(waiter)
+            self._grant_waiters()
+            return False
+
+    def release(self, holder: Hashable, responder_types: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """
+        Return a holder's responders to the pool and serve waiting requests
+
+        Args:
+            holder: Who the responders were reserved for
+            responder_types: Responders to return, or None for all of them
+
+        Returns:
+            Dict[str, int]: The responders actually returned
+        """
+        with self._locked():
+            held = self._holdings.get(holder)
+            if not held:
+                return {}
+            returned = held.copy() if responder_types is None else Counter(responder_types) & held
+            self._release_locked(holder, returned)
+            return dict(returned)
+
+    def _release_locked(self, holder: Hashable, returned: Counter):
+        held = self._holdings[holder]
+        held -= returned
+        if not held:
+            del self._holdings[holder]
+        self._available.update(returned)
+        self._grant_waiters()
+
+    def _remove_waiter(self, waiter: _Waiter):
+        index = bisect.bisect_left(self._waiter_keys, waiter.sort_key)
+        if index < len(self._waiters) and self._waiters[index] is waiter:
+            del self._waiters[index]
+            del self._waiter_keys[index]
+
+    def _grant_waiters(self):
+        """Hand free responders to waiting requests, most severe first"""
+        blocked = set()
+        index = 0
+        while index < len(self._waiters):
+            if all(self._available[t] == 0 or t in blocked for t in self._available):
+                break
+            waiter = self._waiters[index]
+            if waiter.future.done() or blocked.intersection(waiter.needs) or not self._fits(waiter.needs):
+                # A more severe request keeps its claim on the types it needs
+                if not waiter.future.done():
+                    blocked.update(waiter.needs)
+                index += 1
+                continue
+            self._take(waiter.holder, waiter.needs)
+            waiter.granted = True
+            del self._waiters[index]
+            del self._waiter_keys[index]
+            waiter.future.get_loop().call_soon_threadsafe(_resolve, waiter.future)
+
+
+_shared_pool: Optional[ResponderPool] = None
+
+
+def shared_responder_pool() -> ResponderPool:
+    """The process-wide pool every AgentContext dispatches from"""
+    global _shared_pool
+    if _shared_pool is None:
+        _shared_pool = ResponderPool()
+    return _shared_pool
+
+
+def set_shared_responder_pool(pool: ResponderPool):
+    """Replace the process-wide pool, e.g. with one kept in shared state"""
+    global _shared_pool
+    _shared_pool = pool
+
+
+def _resolve(future: asyncio.Future):
+    if not future.done():
+        future.set_result(True)
+
+
+def test_responder_pool_stress():
+    """Thousands of concurrent requests never oversubscribe the pool"""
+    capacity = {"paramedic": 3, "firefighter": 2, "police": 1}
+
+    async def run():
+        pool = ResponderPool(capacity)
+        in_use = Counter()
+        peak = Counter()
+        served = []
+
+        async def request(i: int):
+            types = [["paramedic"], ["firefighter", "paramedic"], ["police"], ["paramedic", "paramedic"]][i % 4]
+            if not await pool.reserve(i, types, severity=i % 10, timeout=None if i % 7 else 0.001):
+                return
+            in_use.update(types)
+            for responder_type in types:
+                peak[responder_type] = max(peak[responder_type], in_use[responder_type])
+                assert in_use[responder_type] <= capacity[responder_type]
+            await asyncio.sleep(0)
+            in_use.subtract(types)
+            served.append(i)
+            assert pool.release(i) == dict(Counter(types))
+
+        await asyncio.gather(*(request(i) for i in range(3000)))
+        assert dict(pool._available) == capacity
+        assert pool.waiting == 0
+        assert peak == Counter(capacity)
+        assert len(served) >= 3000 * 6 // 7
+
+    asyncio.run(run())
+
+
+def test_responder_pool_waiters_only_block_their_types():
+    """A waiting request holds back only the types it needs, and only from requests no more severe"""
+
+    async def run():
+        pool = ResponderPool({"paramedic": 2, "police": 1})
+        assert pool.try_reserve("A", ["police"])
+        waiting_for_police = asyncio.create_task(pool.reserve("B", ["police"], severity=1, timeout=5))
+        await asyncio.sleep(0)
+        assert pool.waiting == 1
+        # Nobody waits for paramedics
+        assert pool.try_reserve("C", ["paramedic"])
+        assert await pool.reserve("D", ["paramedic"], severity=9, timeout=0.5)
+        pool.release("C")
+        pool.release("D")
+
+        # E waits for a police officer and a paramedic, so it holds the paramedics back
+        waiting_for_both = asyncio.create_task(pool.reserve("E", ["police", "paramedic"], severity=5, timeout=5))
+        await asyncio.sleep(0)
+        assert not pool.try_reserve("F", ["paramedic"], severity=5)
+        assert not await pool.reserve("G", ["paramedic"], severity=1, timeout=0.01)
+        # A more severe request goes first, with paramedics to spare
+        assert await pool.reserve("H", ["paramedic"], severity=9, timeout=0.01)
+
+        # The more severe E is served before B
+        pool.release("A")
+        assert await waiting_for_both
+        assert pool.holdings("E") == {"police": 1, "paramedic": 1}
+        pool.release("E")
+        assert await waiting_for_police
+
+    asyncio.run(run())
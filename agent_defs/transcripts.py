@@ -0,0 +1,195 @@
+import atexit
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+
+class TranscriptWriter:
+    """
+    Writes human-readable ``conversation_{id}.txt`` transcripts.
+
+    Open handles are kept in an LRU pool of at most ``max_open_files``, so a
+    busy conversation is not reopened for every line. Writes are buffered and
+    flushed once ``flush_interval`` seconds have passed since the last flush,
+    and on close() or interpreter shutdown.
+    """
+
+    def __init__(self, directory: str = ".", max_open_files: int = 64, flush_interval: float = 1.0):
+        self.directory = directory
+        self.max_open_files = max_open_files
+        self.flush_interval = flush_interval
+        self._handles: "OrderedDict[int, object]" = OrderedDict()
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    def path(self, conversation_id: int) -> str:
+        return os.path.join(self.directory, f"conversation_{conversation_id}.txt")
+
+    def _handle(self, conversation_id: int):
+        f = self._handles.get(conversation_id)
+        if f is not None:
+            self._handles.move_to_end(conversation_id)
+            return f
+
+        if len(self._handles) >= self.max_open_files:
+            _, oldest = self._handles.popitem(last=False)
+            oldest.close()
+        f = open(self.path(conversation_id), "a")
+        self._handles[conversation_id] = f
+        return f
+
+    def write(self, conversation_id: int, text: str, header: Optional[str] = None):
+        """
+        Append a line to a conversation transcript
+
+        Args:
+            conversation_id: ID of the conversation
+            text: Text to append
+            header: Written first if the transcript is still empty
+        """
+        with self._lock:
+            f = self._handle(conversation_id)
+            if header is not None and f.tell() == 0:
+                f.write(f"{header}\n\n")
+            f.write(f"{text}\n\n")
+
+            if time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush()
+
+    def _flush(self):
+        for f in self._handles.values():
+            f.flush()
+        self._last_flush = time.monotonic()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        with self._lock:
+            for f in self._handles.values():
+                f.close()
+            self._handles.clear()
+
+
+class SegmentedTranscriptLog:
+    """
+    Stores every transcript in one append-only log file.
+
+    Each line is a segment: a ``<conversation_id> <byte length>`` header
+    followed by the UTF-8 text, and a length of -1 marks a reset of the
+    conversation. An in-memory index maps each conversation to the offsets of
+    its segments, so a transcript is read back with a few positioned reads and
+    never has to be held in memory. The index is rebuilt on open by walking
+    the segment headers.
+    """
+
+    def __init__(self, log_file: str = "transcripts.log", flush_interval: float = 1.0):
+        self.log_file = log_file
+        self.flush_interval = flush_interval
+        self._index: Dict[int, List[Tuple[int, int]]] = {}
+        self._lock = threading.Lock()
+        self._end = self._rebuild_index()
+        self._writer = open(log_file, "ab")
+        self._reader = os.open(log_file, os.O_RDONLY)
+        self._dirty = False
+        self._last_flush = time.monotonic()
+        atexit.register(self.close)
+
+    def _rebuild_index(self) -> int:
+        try:
+            f = open(self.log_file, "r+b")
+        except FileNotFoundError:
+            return 0
+
+        with f:
+            size = os.fstat(f.fileno()).st_size
+            offset = 0
+            while True:
+                header = f.readline()
+                if not header.endswith(b"\n"):
+                    break
+                try:
+                    conversation_id, length = map(int, header.split())
+                except ValueError:
+                    break
+                start = offset + len(header)
+                if length < 0:
+                    # A reset marker, earlier segments no longer count
+                    self._index.pop(conversation_id, None)
+                    offset = start
+                    continue
+                # The segment body plus its trailing newline must be complete
+                if start + length + 1 > size:
+                    break
+                self._index.setdefault(conversation_id, []).append((start, length))
+                offset = start + length + 1
+                f.seek(offset)
+            # Drop a torn segment left by a crash mid-write
+            f.truncate(offset)
+        return offset
+
+    def write(self, conversation_id: int, text: str, header: Optional[str] = None):
+        """
+        Append a segment to a conversation
+
+        The header is not stored: the caller name is already on the case.
+        """
+        data = text.encode("utf-8")
+        segment_header = f"{conversation_id} {len(data)}\n".encode("ascii")
+        with self._lock:
+            self._writer.write(segment_header + data + b"\n")
+            start = self._end + len(segment_header)
+            self._index.setdefault(conversation_id, []).append((start, len(data)))
+            self._end = start + len(data) + 1
+            self._dirty = True
+
+            if time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush()
+
+    def reset(self, conversation_id: int):
+        """Discard a conversation's segments by appending a reset marker"""
+        segment_header = f"{conversation_id} -1\n".encode("ascii")
+        with self._lock:
+            self._writer.write(segment_header)
+            self._index.pop(conversation_id, None)
+            self._end += len(segment_header)
+            self._dirty = True
+
+            if time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush()
+
+    def segments(self, conversation_id: int) -> List[str]:
+        with self._lock:
+            if self._dirty:
+                self._flush()
+            return [
+                os.pread(self._reader, length, offset).decode("utf-8")
+                for offset, length in self._index.get(conversation_id, [])
+            ]
+
+    def read(self, conversation_id: int) -> str:
+        """Return a conversation's segments joined by newlines"""
+        return "\n".join(self.segments(conversation_id))
+
+    def __contains__(self, conversation_id: int) -> bool:
+        return conversation_id in self._index
+
+    def _flush(self):
+        self._writer.flush()
+        self._dirty = False
+        self._last_flush = time.monotonic()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        with self._lock:
+            if self._writer.closed:
+                return
+            self._writer.close()
+            os.close(self._reader)
@@ -1,15 +1,5 @@
 from __future__ import annotations as _annotations
 
-import asyncio
-import random
-import uuid
-
-from pydantic import BaseModel
-
-from dotenv import load_dotenv
-import os
-import agentops
-
 from agents import (
     Agent,
     HandoffOutputItem,
@@ -0,0 +1,654 @@
+"""
+Micro-benchmarks for the emergency response hot paths.
+
+Run with `python benchmarks.py`, or `python benchmarks.py case_operations tools`
+for some of them. Results can be kept as a baseline and later runs compared
+against it, so storage-layer changes are judged on numbers:
+
+    python benchmarks.py --save-baseline benchmark_baseline.json
+    python benchmarks.py --compare benchmark_baseline.json
+
+A comparison fails when a timing (``*_us``, ``*_ms``) or size (``*bytes*``)
+got worse, or a rate (``*_per_s``) dropped, by more than ``--tolerance``.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+
+from agent_defs.people_info_agg import EmergencyCase, EmergencyResponseSystem
+from agent_defs.transcripts import SegmentedTranscriptLog, TranscriptWriter
+from events import DisasterEvent, EventStore
+from news_index import NewsIndex
+from faq_cache import FAQCache, is_cacheable
+from severity import SeverityRules
+
+
+def _make_case(conversation_id: int) -> EmergencyCase:
+    return EmergencyCase(
+        injury_type="Fall",
+        caller_name=f"Caller {conversation_id}",
+        first_responders_demanded=["paramedic"],
+        conversation_id=conversation_id,
+        need_severity=conversation_id % 10 + 1,
+        closed=False,
+        conversation="Initial report: Person fell down stairs and cannot move their left leg.",
+    )
+
+
+def _seed_data_file(data_file: str, n_cases: int):
+    """Write a snapshot with n_cases directly, bypassing the per-case journal"""
+    with open(data_file, "w") as f:
+        json.dump({"seq": 0, "cases": [_make_case(i).to_dict() for i in range(1, n_cases + 1)]}, f)
+
+
+def benchmark_case_operations(case_counts=(100, 1_000, 10_000, 100_000), n_ops: int = 1_000):
+    """Cold start and per-call cost of the EmergencyResponseSystem API as the case table grows"""
+    line = "Caller: Yes, he's conscious but breathing heavily. He's also sweating a lot."
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for n_cases in case_counts:
+            data_file = os.path.join(tmp_dir, f"bench_{n_cases}.json")
+            _seed_data_file(data_file, n_cases)
+
+            # _load_data runs in the constructor
+            start = time.perf_counter()
+            ers = EmergencyResponseSystem(data_file)
+            load_elapsed = time.perf_counter() - start
+            ids = [i * 7919 % n_cases + 1 for i in range(n_ops)]
+
+            def per_call(operation) -> float:
+                start = time.perf_counter()
+                for i, conversation_id in enumerate(ids):
+                    operation(i, conversation_id)
+                return (time.perf_counter() - start) / n_ops * 1e6
+
+            results[n_cases] = {
+                "load_ms": load_elapsed * 1e3,
+                "get_case_by_id_us": per_call(lambda i, conversation_id: ers.get_case_by_id(conversation_id)),
+                "count_responders_needed_us": per_call(lambda i, conversation_id: ers.count_responders_needed()),
+                "update_case_field_us": per_call(
+                    lambda i, conversation_id: ers.update_case_field(conversation_id, "need_severity", i % 10 + 1)
+                ),
+                "add_to_conversation_us": per_call(
+                    lambda i, conversation_id: ers.add_to_conversation(conversation_id, line)
+                ),
+                "add_case_us": per_call(lambda i, conversation_id: ers.add_case(_make_case(n_cases + i + 1))),
+            }
+            ers.close()
+            print(
+                f"case operations    cases={n_cases:>7}  "
+                + "  ".join(
+                    f"{name.rsplit('_', 1)[0]} {value:.1f}" for name, value in results[n_cases].items()
+                )
+                + "  (ms load, us/call)"
+            )
+    return results
+
+
+def benchmark_tools(n_calls: int = 2_000, n_contexts: int = 50):
+    """Per-call cost of the severity tool and of polling and publishing fake news"""
+    from agents.tool_context import ToolContext
+
+    from agent_defs.disaster_info_agg import FakeNewsSource
+    from agent_defs.responder_coordinator import assess_emergency_severity
+    from context import AgentContext
+    from ingestion import NewsIngestor
+
+    situations = [
+        "My father collapsed, he is unconscious and not breathing.",
+        "Her arm might be broken after the roof gave way.",
+        "We are safe but worried about the ash cloud.",
+    ]
+
+    async def run():
+        context = AgentContext()
+        calls = [json.dumps({"situation": situations[i % len(situations)]}) for i in range(n_calls)]
+        start = time.perf_counter()
+        for i, arguments in enumerate(calls):
+            tool_context = ToolContext(
+                context, tool_name=assess_emergency_severity.name, tool_call_id=f"call_{i}", tool_arguments=arguments
+            )
+            await assess_emergency_severity.on_invoke_tool(tool_context, arguments)
+        severity_elapsed = time.perf_counter() - start
+
+        source = FakeNewsSource()
+        contexts = [AgentContext() for _ in range(n_contexts)]
+        ingestor = NewsIngestor([source], lambda: contexts)
+        poll_elapsed = publish_elapsed = 0.0
+        published = 0
+        for _ in range(n_calls):
+            start = time.perf_counter()
+            events = await source.poll()
+            poll_elapsed += time.perf_counter() - start
+            start = time.perf_counter()
+            if events:
+                ingestor.publish(events)
+                published += 1
+            publish_elapsed += time.perf_counter() - start
+        return severity_elapsed, poll_elapsed, publish_elapsed, published
+
+    severity_elapsed, poll_elapsed, publish_elapsed, published = asyncio.run(run())
+    results = {
+        "assess_emergency_severity_us": severity_elapsed / n_calls * 1e6,
+        "fake_news_poll_us": poll_elapsed / n_calls * 1e6,
+        "news_publish_us": publish_elapsed / max(published, 1) * 1e6,
+    }
+    print(
+        f"tools              assess_emergency_severity {results['assess_emergency_severity_us']:6.1f} us/call  "
+        f"fake news poll {results['fake_news_poll_us']:6.1f} us  "
+        f"publish to {n_contexts} contexts {results['news_publish_us']:7.1f} us/batch"
+    )
+    return results
+
+
+def benchmark_journal_updates(case_counts=(100, 1_000, 10_000, 100_000), n_updates: int = 2_000):
+    """Per-update cost of update_case_field, including amortized compaction"""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for n_cases in case_counts:
+            data_file = os.path.join(tmp_dir, f"bench_{n_cases}.json")
+            _seed_data_file(data_file, n_cases)
+            ers = EmergencyResponseSystem(data_file)
+
+            start = time.perf_counter()
+            for i in range(n_updates):
+                # Spread updates over the whole table rather than its head
+                conversation_id = i * 7919 % n_cases + 1
+                ers.update_case_field(conversation_id, "need_severity", i % 10 + 1)
+            elapsed = time.perf_counter() - start
+            ers.close()
+
+            results[n_cases] = elapsed / n_updates * 1e6
+            print(f"update_case_field  cases={n_cases:>7}  {results[n_cases]:8.1f} us/update")
+    return results
+
+
+def benchmark_dispatch_queue(case_counts=(100, 1_000, 10_000, 100_000), n_pops: int = 1_000):
+    """Cost of pop_most_severe with the whole table queued"""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for n_cases in case_counts:
+            data_file = os.path.join(tmp_dir, f"bench_{n_cases}.json")
+            _seed_data_file(data_file, n_cases)
+            ers = EmergencyResponseSystem(data_file)
+
+            pops = min(n_pops, n_cases)
+            start = time.perf_counter()
+            for _ in range(pops):
+                ers.pop_most_severe()
+            elapsed = time.perf_counter() - start
+            ers.close()
+
+            results[n_cases] = elapsed / pops * 1e6
+            print(f"pop_most_severe    cases={n_cases:>7}  {results[n_cases]:8.1f} us/pop")
+    return results
+
+
+def benchmark_snapshot_size(n_cases: int = 1_000, lines_per_case=(1, 10, 100)):
+    """Snapshot size as conversations grow, which should stay flat"""
+    line = "Caller: Yes, he's conscious but breathing heavily. He's also sweating a lot."
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for n_lines in lines_per_case:
+            data_file = os.path.join(tmp_dir, f"bench_{n_lines}.json")
+            ers = EmergencyResponseSystem(data_file)
+            with ers.transaction():
+                for conversation_id in range(1, n_cases + 1):
+                    ers.add_case(_make_case(conversation_id))
+                    for _ in range(n_lines - 1):
+                        ers.add_to_conversation(conversation_id, line)
+            ers.compact()
+            ers.close()
+
+            results[n_lines] = os.path.getsize(data_file)
+            print(f"snapshot size      lines/case={n_lines:>4}  {results[n_lines]:>10} bytes")
+    return results
+
+
+@dataclass
+class _DataclassCase:
+    """EmergencyCase as it was before the slotted representation"""
+
+    injury_type: str
+    caller_name: str
+    first_responders_demanded: List[str]
+    conversation_id: int
+    need_severity: int
+    closed: bool
+    conversation: str
+
+    def to_dict(self):
+        return asdict(self)
+
+
+def benchmark_case_representation(n_cases: int = 1_000_000):
+    """Memory and to_dict cost of the slotted EmergencyCase against the old dataclass"""
+    injury_types = ["Fall", "Heart attack", "Car accident", "Building fire", "Burn"]
+    responders = ["paramedic", "police", "firefighter"]
+    results = {}
+    for name, cls in (("dataclass", _DataclassCase), ("EmergencyCase", EmergencyCase)):
+        tracemalloc.start()
+        cases = [
+            cls(
+                # Built per case, as strings parsed from JSON would be
+                "".join(injury_types[i % 5]),
+                f"Caller {i}",
+                ["".join(r) for r in responders[: i % 3 + 1]],
+                i,
+                i % 10 + 1,
+                False,
+                "",
+            )
+            for i in range(n_cases)
+        ]
+        memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        for case in cases:
+            case.to_dict()
+        elapsed = time.perf_counter() - start
+        del cases
+
+        results[name] = {"bytes_per_case": memory / n_cases, "to_dict_us": elapsed / n_cases * 1e6}
+        print(
+            f"case table         {name:<14} cases={n_cases}  "
+            f"{results[name]['bytes_per_case']:6.0f} B/case  {results[name]['to_dict_us']:5.2f} us/to_dict"
+        )
+    return results
+
+
+def benchmark_transcript_writes(n_conversations: int = 500, lines_per_conversation: int = 20):
+    """Transcript lines written per second, interleaved across conversations"""
+    line = "Dispatcher: Is the patient conscious? Can you describe their breathing?"
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+
+        def open_per_line(conversation_id: int, text: str):
+            with open(os.path.join(tmp_dir, f"direct_{conversation_id}.txt"), "a") as f:
+                f.write(f"{text}\n\n")
+
+        writers = {
+            "open_per_line": (open_per_line, lambda: None),
+            "TranscriptWriter": TranscriptWriter(os.path.join(tmp_dir)),
+            "SegmentedTranscriptLog": SegmentedTranscriptLog(os.path.join(tmp_dir, "transcripts.log")),
+        }
+        for name, writer in writers.items():
+            write, close = writer if isinstance(writer, tuple) else (writer.write, writer.close)
+            start = time.perf_counter()
+            for _ in range(lines_per_conversation):
+                for conversation_id in range(n_conversations):
+                    write(conversation_id, line)
+            close()
+            elapsed = time.perf_counter() - start
+
+            results[name] = n_conversations * lines_per_conversation / elapsed
+            print(f"transcript writes  {name:<24} {results[name]:10.0f} lines/s")
+    return results
+
+
+def _updated_event(base_events: List[DisasterEvent], i: int) -> DisasterEvent:
+    event = base_events[i % len(base_events)]
+    return DisasterEvent(event.time_label, event.title, f"{event.headline} (update {i})", event.body)
+
+
+def benchmark_event_store(n_updates: int = 100_000, max_events: int = 1000):
+    """Timeline memory and render cost stay flat once the ring buffer is full"""
+    from context import AgentContext
+
+    base_events = list(AgentContext().events)
+    store = EventStore(max_events=max_events)
+    results = {}
+    checkpoints = {n_updates // 100, n_updates // 10, n_updates}
+    start = time.perf_counter()
+    for i in range(1, n_updates + 1):
+        store.add(_updated_event(base_events, i))
+        if i in checkpoints:
+            render_start = time.perf_counter()
+            rendered = store.render()
+            results[i] = {
+                "events": len(store),
+                "rendered_chars": len(rendered),
+                "render_ms": (time.perf_counter() - render_start) * 1e3,
+            }
+            print(
+                f"event store        updates={i:>7}  events={len(store):>5}  "
+                f"rendered {len(rendered):>9} chars  render {results[i]['render_ms']:6.2f} ms"
+            )
+    elapsed = time.perf_counter() - start
+    print(f"event store        {n_updates / elapsed:10.0f} adds/s")
+    return results
+
+
+def benchmark_news_lookup(timeline_sizes=(20, 200, 2_000, 20_000), n_lookups: int = 200):
+    """Prompt size and latency of a FAQ lookup as the disaster timeline grows"""
+    from context import AgentContext
+
+    base_events = list(AgentContext().events)
+    questions = ["are flights cancelled", "when will the airport reopen", "is there an evacuation", "ash cloud"]
+    results = {}
+    for n_entries in timeline_sizes:
+        store = EventStore(max_events=n_entries)
+        store.extend([_updated_event(base_events, i) for i in range(n_entries)])
+        timeline = store.render()
+        index = NewsIndex()
+        index.sync(store)
+
+        start = time.perf_counter()
+        for i in range(n_lookups):
+            answer = index.lookup(questions[i % len(questions)])
+        elapsed = time.perf_counter() - start
+
+        # A full store evicts its oldest event; syncing only indexes the new one
+        store.add(_updated_event(base_events, n_entries))
+        start = time.perf_counter()
+        index.sync(store)
+        sync_elapsed = time.perf_counter() - start
+
+        results[n_entries] = {
+            "timeline_chars": len(timeline),
+            "lookup_chars": len(answer),
+            "lookup_us": elapsed / n_lookups * 1e6,
+            "sync_us": sync_elapsed * 1e6,
+        }
+        print(
+            f"news lookup        entries={n_entries:>6}  timeline {len(timeline):>9} chars  "
+            f"answer {len(answer):>5} chars  {results[n_entries]['lookup_us']:8.1f} us/lookup  "
+            f"{results[n_entries]['sync_us']:8.1f} us/append"
+        )
+    return results
+
+
+def _keyword_loop_severity(situation: str) -> str:
+    """assess_emergency_severity before the rules engine, kept as the baseline"""
+    critical_keywords = ["unconscious", "bleeding heavily", "not breathing", "heart attack", "stroke"]
+    urgent_keywords = ["broken", "injury", "chest pain", "difficulty breathing"]
+
+    situation_lower = situation.lower()
+    for keyword in critical_keywords:
+        if keyword in situation_lower:
+            return "CRITICAL"
+    for keyword in urgent_keywords:
+        if keyword in situation_lower:
+            return "URGENT"
+    return "NON-URGENT"
+
+
+def benchmark_severity_rules(n_situations: int = 10_000, extra_rules=(0, 200)):
+    """Keyword loop vs compiled rules vs the batch API, with the default and a larger rule set"""
+    from severity import SeverityRule
+
+    templates = [
+        "Caller reports a fall near the shelter, {} and asks for help.",
+        "My father collapsed, he is unconscious and {}.",
+        "We are safe but worried about the ash cloud, {}.",
+        "Her arm might be broken after the roof gave way, {}.",
+    ]
+    situations = [templates[i % len(templates)].format(f"report {i}") for i in range(n_situations)]
+    default = SeverityRules.load()
+    assert [default.classify(situation) for situation in situations] == [
+        _keyword_loop_severity(situation) for situation in situations
+    ]
+
+    results = {}
+    for n_extra in extra_rules:
+        extended = default.rules + [SeverityRule(f"symptom {i}", "URGENT") for i in range(n_extra)]
+        rules = SeverityRules(extended, default.levels, default.default)
+        compiled = SeverityRules(extended, default.levels, default.default, compile_above=0)
+        n_rules = len(rules.rules)
+        keywords = [rule.phrase for rule in rules.rules]
+
+        start = time.perf_counter()
+        for situation in situations:
+            situation_lower = situation.lower()
+            any(keyword in situation_lower for keyword in keywords)
+        loop_elapsed = time.perf_counter() - start
+
+        timings = {}
+        for name, engine in (("default", rules), ("compiled", compiled)):
+            start = time.perf_counter()
+            for situation in situations:
+                engine.classify(situation)
+            timings[name] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        rules.classify_many(situations)
+        batch_elapsed = time.perf_counter() - start
+
+        # "default" is whichever engine the rule count selects, the one production uses
+        results[n_rules] = {
+            "loop_us": loop_elapsed / n_situations * 1e6,
+            "default_us": timings["default"] / n_situations * 1e6,
+            "compiled_us": timings["compiled"] / n_situations * 1e6,
+            "batch_us": batch_elapsed / n_situations * 1e6,
+        }
+        print(
+            f"severity rules     rules={n_rules:>4}  loop {results[n_rules]['loop_us']:6.2f} us  "
+            f"default {results[n_rules]['default_us']:6.2f} us  compiled {results[n_rules]['compiled_us']:6.2f} us  "
+            f"batch {results[n_rules]['batch_us']:6.2f} us/text"
+        )
+    return results
+
+
+def benchmark_faq_cache(n_callers: int = 2_000, news_every: int = 250):
+    """Model calls avoided by the FAQ cache when replaying an incident's questions"""
+    import random
+    from context import AgentContext
+
+    questions = [
+        ["Are flights cancelled?", "are the flights cancelled", "Are flights canceled?"],
+        ["When will the airport reopen?", "when does the airport reopen", "When will the airport re-open?"],
+        ["Is there an evacuation order?", "is there an evacuation order", "Is there an evacuation order in place?"],
+        ["Where is the ash cloud heading?", "where's the ash cloud heading", "Where is the ash cloud heading now?"],
+        ["Can I get a refund for my flight?", "can i get a refund on my flight", "How do I get a refund for my flight?"],
+    ]
+    base_events = list(AgentContext().events)
+    rng = random.Random(0)
+
+    results = {}
+    for name, cache in [("exact", FAQCache(similarity=None)), ("shingles", FAQCache())]:
+        store = EventStore()
+        store.extend(base_events)
+        model_calls = 0
+        start = time.perf_counter()
+        for i in range(n_callers):
+            if i and i % news_every == 0:
+                store.add(_updated_event(base_events, i))
+            question = rng.choice(rng.choice(questions))
+            answer = cache.get(question, store.fingerprint) if is_cacheable(question) else None
+            if answer is None:
+                # Stands in for a faq_agent run
+                model_calls += 1
+                cache.put(question, store.fingerprint, f"answer {i}")
+        elapsed = time.perf_counter() - start
+
+        results[name] = {
+            "model_calls": model_calls,
+            "calls_avoided": cache.stats.model_calls_avoided,
+            "hit_rate": cache.stats.hit_rate,
+            "lookup_us": elapsed / n_callers * 1e6,
+        }
+        print(
+            f"faq cache          {name:<9} {n_callers} questions  {model_calls:>5} model calls  "
+            f"{cache.stats.model_calls_avoided:>5} avoided ({cache.stats.hit_rate:.0%} hit rate)  "
+            f"{results[name]['lookup_us']:6.1f} us/question"
+        )
+    return results
+
+
+def benchmark_first_aid_lookup(corpus_sizes=(26, 1_000, 10_000, 100_000), n_lookups: int = 1_000):
+    """Open and lookup latency of the memory-mapped first-aid index as the corpus grows"""
+    from first_aid import DEFAULT_CORPUS, FirstAidKB, build_index
+
+    with open(DEFAULT_CORPUS, "r") as f:
+        base_articles = json.load(f)["articles"]
+    questions = [
+        "My son got a burn from the hot ash",
+        "I think my arm is broken",
+        "I got ash in my eyes, what do I do?",
+        "She is bleeding from a cut on her leg",
+        "When will the airport reopen?",
+    ]
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for n_articles in corpus_sizes:
+            # Variants with their own terms, so postings and the term table grow with the corpus
+            articles = [
+                {**article, "keywords": f"{article.get('keywords', '')} variant{i}"}
+                for i, article in ((i, base_articles[i % len(base_articles)]) for i in range(n_articles))
+            ]
+            path = os.path.join(tmp_dir, f"first_aid_{n_articles}.idx")
+            start = time.perf_counter()
+            build_index(articles, path)
+            build_elapsed = time.perf_counter() - start
+
+            start = time.perf_counter()
+            kb = FirstAidKB(path, cache_size=0)
+            open_elapsed = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for i in range(n_lookups):
+                kb.lookup(questions[i % len(questions)])
+            lookup_elapsed = time.perf_counter() - start
+            kb.close()
+
+            kb = FirstAidKB(path)
+            start = time.perf_counter()
+            for i in range(n_lookups):
+                kb.lookup(questions[i % len(questions)])
+            cached_elapsed = time.perf_counter() - start
+            kb.close()
+
+            results[n_articles] = {
+                "index_bytes": os.path.getsize(path),
+                "build_ms": build_elapsed * 1e3,
+                "open_ms": open_elapsed * 1e3,
+                "lookup_us": lookup_elapsed / n_lookups * 1e6,
+                "cached_lookup_us": cached_elapsed / n_lookups * 1e6,
+            }
+            print(
+                f"first aid lookup   articles={n_articles:>6}  index {results[n_articles]['index_bytes']:>10} bytes  "
+                f"open {results[n_articles]['open_ms']:6.2f} ms  lookup {results[n_articles]['lookup_us']:8.1f} us  "
+                f"cached {results[n_articles]['cached_lookup_us']:5.1f} us"
+            )
+    return results
+
+
+def benchmark_import_time(modules=("main", "server", "agent_graph"), repeats: int = 3):
+    """Import time of the entry points in a fresh interpreter, best of a few runs"""
+    from startup import import_times
+
+    results = {}
+    for module in modules:
+        results[module] = min(import_times(module)[module][1] for _ in range(repeats)) / 1000
+        print(f"import time        {module:<12} {results[module]:8.0f} ms")
+    return results
+
+
+# Benchmark name: (function, name of the metric when it returns plain numbers)
+BENCHMARKS = {
+    "case_operations": (benchmark_case_operations, None),
+    "tools": (benchmark_tools, None),
+    "journal_updates": (benchmark_journal_updates, "update_us"),
+    "dispatch_queue": (benchmark_dispatch_queue, "pop_us"),
+    "snapshot_size": (benchmark_snapshot_size, "snapshot_bytes"),
+    "case_representation": (benchmark_case_representation, None),
+    "transcript_writes": (benchmark_transcript_writes, "lines_per_s"),
+    "event_store": (benchmark_event_store, None),
+    "news_lookup": (benchmark_news_lookup, None),
+    "severity_rules": (benchmark_severity_rules, None),
+    "faq_cache": (benchmark_faq_cache, None),
+    "first_aid_lookup": (benchmark_first_aid_lookup, None),
+    "import_time": (benchmark_import_time, "import_ms"),
+}
+
+
+def flatten_results(name: str, results: Any, metric: Optional[str] = None) -> Dict[str, float]:
+    """Turn nested benchmark results into {"name.param.metric": value}"""
+    if isinstance(results, dict):
+        flat = {}
+        for key, value in results.items():
+            flat.update(flatten_results(f"{name}.{key}", value, metric))
+        return flat
+    return {f"{name}.{metric}" if metric else name: float(results)}
+
+
+def _direction(metric: str) -> int:
+    """1 when higher is better, -1 when lower is better, 0 for informational metrics"""
+    if metric.endswith("_per_s"):
+        return 1
+    if metric.endswith(("_us", "_ms")) or "bytes" in metric:
+        return -1
+    return 0
+
+
+def compare_results(baseline: Dict[str, float], current: Dict[str, float], tolerance: float) -> List[str]:
+    """
+    Print each metric against its baseline and list the regressions
+
+    Args:
+        baseline: Flattened results of the baseline run
+        current: Flattened results of this run
+        tolerance: Allowed relative change for the worse, e.g. 0.25 for 25%
+
+    Returns:
+        List[str]: Metrics that regressed beyond the tolerance
+    """
+    regressions = []
+    for metric, value in current.items():
+        before = baseline.get(metric)
+        direction = _direction(metric)
+        if before is None:
+            print(f"  {metric:<60} {value:14.2f}  (new)")
+            continue
+        change = (value - before) / before if before else 0.0
+        regressed = direction != 0 and -direction * change > tolerance
+        if regressed:
+            regressions.append(metric)
+        flag = "REGRESSION" if regressed else ("" if direction else "info")
+        print(f"  {metric:<60} {before:14.2f} -> {value:14.2f}  {change:+7.1%}  {flag}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for the emergency response hot paths")
+    parser.add_argument("benchmarks", nargs="*", help=f"benchmarks to run, default all: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--save-baseline", metavar="FILE", help="write the results to a JSON baseline")
+    parser.add_argument("--compare", metavar="FILE", help="compare the results against a JSON baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+
+    results: Dict[str, float] = {}
+    for name in args.benchmarks or BENCHMARKS:
+        function, metric = BENCHMARKS[name]
+        results.update(flatten_results(name, function(), metric))
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Saved {len(results)} metrics to {args.save_baseline}")
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+        regressions = compare_results(baseline, results, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} metrics regressed by more than {args.tolerance:.0%}")
+            return 1
+        print("No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
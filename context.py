@@ -1,85 +1,144 @@
+import uuid
+from typing import List, Optional
+
 from openai import BaseModel
+from pydantic import Field, PrivateAttr, computed_field
 
+from agent_defs.responder_pool import ResponderPool, shared_responder_pool
 
-class AgentContext(BaseModel):
-    """Global state of the system"""
+from events import DisasterEvent, EventStore, parse_timeline
+from news_index import NewsIndex
+from shared_state import shared_timeline
 
-    disaster_info: str = """
-    ### Disaster Timeline: Volcanic Ash Crisis
+_TIMELINE_TITLE = "### Disaster Timeline: Volcanic Ash Crisis"
+_INITIAL_TIMELINE = """
+- **07:45 AM – Early Warning**  
+_"Seismic Activity Detected Near Mount Caldera"_  
+Seismologists report unusual tremors around Mount Caldera. Authorities and local media begin monitoring for potential volcanic activity.
 
-    - **07:45 AM – Early Warning**  
-    _"Seismic Activity Detected Near Mount Caldera"_  
-    Seismologists report unusual tremors around Mount Caldera. Authorities and local media begin monitoring for potential volcanic activity.
+- **08:00 AM – Initial Eruption**  
+_"Mount Caldera Erupts: Minor Ash Emissions Observed"_  
+A small eruption occurs, sending a limited ash plume into the sky. Aviation authorities are alerted and begin assessing the risk.
 
-    - **08:00 AM – Initial Eruption**  
-    _"Mount Caldera Erupts: Minor Ash Emissions Observed"_  
-    A small eruption occurs, sending a limited ash plume into the sky. Aviation authorities are alerted and begin assessing the risk.
+- **08:15 AM – Aviation Alert Issued**  
+_"Air Traffic Control Monitors Ash Cloud: Flight Delays Expected"_  
+Preliminary advisories are issued to airlines as the ash cloud begins drifting toward major flight corridors.
 
-    - **08:15 AM – Aviation Alert Issued**  
-    _"Air Traffic Control Monitors Ash Cloud: Flight Delays Expected"_  
-    Preliminary advisories are issued to airlines as the ash cloud begins drifting toward major flight corridors.
+- **08:30 AM – Impact Near Airports**  
+_"Volcanic Ash Cloud Approaching International Airport"_  
+Reports indicate the ash cloud is nearing one of the region's busiest airports, raising concerns about engine safety and visibility.
 
-    - **08:30 AM – Impact Near Airports**  
-    _"Volcanic Ash Cloud Approaching International Airport"_  
-    Reports indicate the ash cloud is nearing one of the region's busiest airports, raising concerns about engine safety and visibility.
+- **08:45 AM – Flight Rerouting Begins**  
+_"Emergency Advisory: Non-Essential Flights Rerouted or Grounded"_  
+In response to safety risks, aviation authorities instruct airlines to divert or temporarily ground flights until conditions are reassessed.
 
-    - **08:45 AM – Flight Rerouting Begins**  
-    _"Emergency Advisory: Non-Essential Flights Rerouted or Grounded"_  
-    In response to safety risks, aviation authorities instruct airlines to divert or temporarily ground flights until conditions are reassessed.
+- **09:00 AM – Cancellations Announced**  
+_"Major Airlines Cancel Dozens of Flights Amid Ash Hazard"_  
+Airlines begin canceling scheduled departures. Passengers across multiple terminals are advised to check for updates.
 
-    - **09:00 AM – Cancellations Announced**  
-    _"Major Airlines Cancel Dozens of Flights Amid Ash Hazard"_  
-    Airlines begin canceling scheduled departures. Passengers across multiple terminals are advised to check for updates.
+- **09:15 AM – Airport Operations Halt**  
+_"Airport Shutdown: Runways Closed Due to Ash Contamination"_  
+Local news reports confirm that a primary airport has suspended operations, with emergency crews on site to manage the fallout.
 
-    - **09:15 AM – Airport Operations Halt**  
-    _"Airport Shutdown: Runways Closed Due to Ash Contamination"_  
-    Local news reports confirm that a primary airport has suspended operations, with emergency crews on site to manage the fallout.
+- **09:30 AM – Government Press Conference**  
+_"Officials Address Volcanic Emergency; Evacuation Protocols Discussed"_  
+Government representatives hold a press briefing to outline safety measures and coordinate evacuation plans for affected communities.
 
-    - **09:30 AM – Government Press Conference**  
-    _"Officials Address Volcanic Emergency; Evacuation Protocols Discussed"_  
-    Government representatives hold a press briefing to outline safety measures and coordinate evacuation plans for affected communities.
+- **10:00 AM – International Impact**  
+_"Airspace Declared Hazardous: International Flight Routes Disrupted"_  
+The ash cloud's movement forces neighboring countries to close parts of their airspace, impacting transcontinental flights and travel plans worldwide.
 
-    - **10:00 AM – International Impact**  
-    _"Airspace Declared Hazardous: International Flight Routes Disrupted"_  
-    The ash cloud's movement forces neighboring countries to close parts of their airspace, impacting transcontinental flights and travel plans worldwide.
+- **11:00 AM – Regional Updates**  
+_"Ash Cloud Drifting Westward; Impact Extends to Neighboring Regions"_  
+Meteorological experts update the public as the ash plume spreads, affecting additional airports and travel hubs.
 
-    - **11:00 AM – Regional Updates**  
-    _"Ash Cloud Drifting Westward; Impact Extends to Neighboring Regions"_  
-    Meteorological experts update the public as the ash plume spreads, affecting additional airports and travel hubs.
+- **12:00 PM – Emergency Response Escalates**  
+_"Emergency Crews Deployed to Assist Stranded Passengers"_  
+Rescue operations and ground support teams are mobilized at affected airports, providing relief and information to stranded travelers.
 
-    - **12:00 PM – Emergency Response Escalates**  
-    _"Emergency Crews Deployed to Assist Stranded Passengers"_  
-    Rescue operations and ground support teams are mobilized at affected airports, providing relief and information to stranded travelers.
+- **01:00 PM – Monitoring Conditions**  
+_"Experts Report Decreasing Ash Density; Caution Still Advised"_  
+Ongoing assessments show the ash cloud is beginning to thin. However, officials stress that conditions remain volatile for flight operations.
 
-    - **01:00 PM – Monitoring Conditions**  
-    _"Experts Report Decreasing Ash Density; Caution Still Advised"_  
-    Ongoing assessments show the ash cloud is beginning to thin. However, officials stress that conditions remain volatile for flight operations.
+- **02:00 PM – Gradual Resumption of Flights**  
+_"Air Traffic Slowly Resumes as Authorities Reassess Safety Measures"_  
+With improving atmospheric conditions, airlines cautiously start rebooking and resuming select flights on cleared routes.
 
-    - **02:00 PM – Gradual Resumption of Flights**  
-    _"Air Traffic Slowly Resumes as Authorities Reassess Safety Measures"_  
-    With improving atmospheric conditions, airlines cautiously start rebooking and resuming select flights on cleared routes.
+- **03:00 PM – Passenger Rebooking and Refunds**  
+_"Airlines Initiate Passenger Rebooking and Offer Refund Options"_  
+Airlines issue rebooking instructions and refunds, advising passengers to stay tuned for further travel updates.
 
-    - **03:00 PM – Passenger Rebooking and Refunds**  
-    _"Airlines Initiate Passenger Rebooking and Offer Refund Options"_  
-    Airlines issue rebooking instructions and refunds, advising passengers to stay tuned for further travel updates.
+- **04:00 PM – Cleanup and Recovery Efforts**  
+_"Airport Cleanup Begins: Runway Maintenance and Safety Inspections Underway"_  
+Maintenance crews commence decontamination procedures at the impacted airport, preparing for a return to normal operations.
 
-    - **04:00 PM – Cleanup and Recovery Efforts**  
-    _"Airport Cleanup Begins: Runway Maintenance and Safety Inspections Underway"_  
-    Maintenance crews commence decontamination procedures at the impacted airport, preparing for a return to normal operations.
+- **05:00 PM – Investigation Launched**  
+_"Authorities Launch Investigation into Volcanic Impact on Aviation"_  
+A full-scale inquiry is announced to examine the event's effects on air traffic management and safety protocols.
 
-    - **05:00 PM – Investigation Launched**  
-    _"Authorities Launch Investigation into Volcanic Impact on Aviation"_  
-    A full-scale inquiry is announced to examine the event's effects on air traffic management and safety protocols.
+- **06:00 PM – Situation Stabilizes**  
+_"Officials Confirm: All Airports to Resume Full Operations Tomorrow"_  
+With the ash cloud dissipating and cleanup efforts progressing, officials project a return to normal air travel by the next day.
 
-    - **06:00 PM – Situation Stabilizes**  
-    _"Officials Confirm: All Airports to Resume Full Operations Tomorrow"_  
-    With the ash cloud dissipating and cleanup efforts progressing, officials project a return to normal air travel by the next day.
+- **07:00 PM – Day-End Summary**  
+_"Disaster Day Concludes: Lessons Learned, Safety Protocols to Improve"_  
+Media outlets wrap up the day with analysis and statements from aviation experts, emphasizing the need for enhanced monitoring and rapid response plans for future incidents.
+"""
+# Parsed once, shared by every context
+_INITIAL_EVENTS: List[DisasterEvent] = parse_timeline(_INITIAL_TIMELINE)
 
-    - **07:00 PM – Day-End Summary**  
-    _"Disaster Day Concludes: Lessons Learned, Safety Protocols to Improve"_  
-    Media outlets wrap up the day with analysis and statements from aviation experts, emphasizing the need for enhanced monitoring and rapid response plans for future incidents.
-    """
 
-    i_news: int = 0
-    available_responders: int = 5  # Starting with 5 available responders
+class AgentContext(BaseModel):
+    """Global state of the system"""
 
+    caller_id: str = Field(default_factory=lambda: uuid.uuid4().hex[:16])  # Holds this caller's responders
+    responder_wait_seconds: float = 10.0  # How long a request waits for a free responder
+    max_events: int = 1000  # Oldest disaster events are dropped beyond this
+    event_retention_hours: Optional[float] = None  # Drop disaster events older than this
+
+    _events: EventStore = PrivateAttr()
+    _news_index: NewsIndex = PrivateAttr(default_factory=NewsIndex)
+    _responder_pool: ResponderPool = PrivateAttr(default_factory=shared_responder_pool)
+    # Last shared timeline event copied into _events
+    _timeline_seq: int = PrivateAttr(default=0)
+
+    def model_post_init(self, __context):
+        retention = self.event_retention_hours * 3600 if self.event_retention_hours is not None else None
+        self._events = EventStore(_TIMELINE_TITLE, self.max_events, retention)
+        self._events.extend(_INITIAL_EVENTS)
+
+    @property
+    def responder_pool(self) -> ResponderPool:
+        """First responders, shared by every context in the process"""
+        return self._responder_pool
+
+    def close(self):
+        """Give back the responders this caller still holds, e.g. when the session ends"""
+        self._responder_pool.release(self.caller_id)
+
+    @computed_field
+    @property
+    def available_responders(self) -> int:
+        return self._responder_pool.available()
+
+    @property
+    def events(self) -> EventStore:
+        """Disaster timeline events, newest last, including any published to the shared timeline"""
+        timeline = shared_timeline()
+        if timeline is not None:
+            for seq, received_at, event in timeline.since(self._timeline_seq):
+                self._events.add(event, received_at)
+                self._timeline_seq = seq
+        return self._events
+
+    @computed_field
+    @property
+    def disaster_info(self) -> str:
+        """The disaster timeline as markdown"""
+        return self.events.render()
+
+    @property
+    def news_index(self) -> NewsIndex:
+        """Retrieval index over the disaster events, synced on lookup"""
+        self._news_index.sync(self.events)
+        return self._news_index
@@ -0,0 +1,182 @@
+"""
+Typed, bounded store for disaster timeline events.
+
+Replaces the ever-growing disaster_info markdown string: events are kept in a
+ring buffer ordered by arrival, deduplicated by headline and dropped once they
+fall out of the retention window. The markdown view is rendered lazily and
+cached until the events change.
+"""
+
+import hashlib
+import re
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+_ENTRY_RE = re.compile(r"(?m)^[ \t]*- ")
+_HEADER_RE = re.compile(r"^\**\s*(?P<time>\d{1,2}:\d{2}\s*[AP]M)\s*[–-]\s*(?P<title>.*?)\s*\**$")
+
+
+def split_entries(text: str) -> List[str]:
+    """Split a markdown timeline into one entry per top-level bullet"""
+    return [entry.strip() for entry in _ENTRY_RE.split(text)[1:] if entry.strip()]
+
+
+def _normalize_headline(headline: str) -> str:
+    return " ".join(re.findall(r"[a-z0-9]+", headline.lower()))
+
+
+@dataclass(frozen=True)
+class DisasterEvent:
+    time_label: str
+    title: str
+    headline: str
+    body: str
+
+    @classmethod
+    def parse(cls, text: str) -> Optional["DisasterEvent"]:
+        """
+        Parse a news item in either the _NEWS or the markdown timeline format
+
+        Returns:
+            Optional[DisasterEvent]: The event, or None if the text is not one
+        """
+        lines = [line.strip() for line in text.strip().splitlines() if line.strip()]
+        if len(lines) < 2:
+            return None
+        match = _HEADER_RE.match(lines[0])
+        if not match:
+            return None
+        headline = lines[1].strip("_").strip('"“”')
+        return cls(match["time"], match["title"], headline, " ".join(lines[2:]))
+
+    @property
+    def key(self) -> str:
+        """Deduplication key: the headline without case or punctuation"""
+        return _normalize_headline(self.headline)
+
+    def render(self) -> str:
+        return f'**{self.time_label} – {self.title}**  \n_"{self.headline}"_  \n{self.body}'
+
+
+def parse_timeline(text: str) -> List[DisasterEvent]:
+    """Parse every event of a markdown timeline, skipping entries that are not events"""
+    events = [DisasterEvent.parse(entry) for entry in split_entries(text)]
+    return [event for event in events if event is not None]
+
+
+class EventStore:
+    """
+    Ring buffer of disaster events.
+
+    At most ``max_events`` events are kept, and with ``retention`` set, events
+    older than that many seconds are pruned as new ones arrive. Every change
+    bumps ``version``.
+    """
+
+    def __init__(
+        self,
+        title: str = "### Disaster Timeline",
+        max_events: int = 1000,
+        retention: Optional[float] = None,
+    ):
+        self.title = title
+        self.max_events = max_events
+        self.retention = retention
+        self.version = 0
+        # (seq, received_at, event), oldest first
+        self._events: Deque[Tuple[int, float, DisasterEvent]] = deque()
+        self._by_key: Dict[str, int] = {}
+        self._next_seq = 1
+        self._rendered: Optional[str] = None
+        self._fingerprint: Optional[str] = None
+
+    def __len__(self):
+        return len(self._events)
+
+    def __iter__(self) -> Iterator[DisasterEvent]:
+        return (event for _, _, event in self._events)
+
+    def add(self, event: DisasterEvent, received_at: Optional[float] = None) -> bool:
+        """
+        Add an event unless one with the same headline is already stored
+
+        Returns:
+            bool: True if the event was added
+        """
+        received_at = time.time() if received_at is None else received_at
+        self.prune(received_at)
+        if event.key in self._by_key:
+            return False
+
+        if len(self._events) >= self.max_events:
+            self._evict_oldest()
+        self._events.append((self._next_seq, received_at, event))
+        self._by_key[event.key] = self._next_seq
+        self._next_seq += 1
+        self._changed()
+        return True
+
+    def extend(self, events: List[DisasterEvent], received_at: Optional[float] = None) -> int:
+        return sum(self.add(event, received_at) for event in events)
+
+    def prune(self, now: Optional[float] = None):
+        """Drop events older than the retention window"""
+        if self.retention is None:
+            return
+        cutoff = (time.time() if now is None else now) - self.retention
+        pruned = False
+        while self._events and self._events[0][1] < cutoff:
+            self._evict_oldest()
+            pruned = True
+        if pruned:
+            self._changed()
+
+    def _evict_oldest(self):
+        _, _, event = self._events.popleft()
+        del self._by_key[event.key]
+
+    def _changed(self):
+        self.version += 1
+        self._rendered = None
+        self._fingerprint = None
+
+    @property
+    def oldest_seq(self) -> int:
+        """Sequence number of the oldest stored event, or the next one if empty"""
+        return self._events[0][0] if self._events else self._next_seq
+
+    def since(self, seq: int) -> List[Tuple[int, DisasterEvent]]:
+        """Stored events with a sequence number above seq, oldest first"""
+        newer = []
+        for event_seq, _, event in reversed(self._events):
+            if event_seq <= seq:
+                break
+            newer.append((event_seq, event))
+        newer.reverse()
+        return newer
+
+    def latest(self, n: int) -> List[DisasterEvent]:
+        return [event for _, event in self.since(self._next_seq - 1 - n)]
+
+    @property
+    def fingerprint(self) -> str:
+        """
+        Digest of the stored headlines
+
+        Unlike version, it is equal for any two stores holding the same
+        events, so it can key data derived from the timeline across sessions.
+        """
+        if self._fingerprint is None:
+            digest = hashlib.blake2b(digest_size=8)
+            for event in self:
+                digest.update(event.key.encode("utf-8") + b"\n")
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    def render(self) -> str:
+        """The timeline as markdown, rebuilt only after the events change"""
+        if self._rendered is None:
+            self._rendered = "\n\n".join([self.title] + [f"- {event.render()}" for event in self])
+        return self._rendered
@@ -0,0 +1,241 @@
+"""
+Scripted stand-in for the OpenAI model, so the agent graph runs offline.
+
+ScriptedModel plays every agent deterministically from the conversation:
+
+1. An agent with handoffs that has not handed off since the caller's last
+   message transfers to the specialist the fast-path router picks, and
+   answers itself when the router would defer.
+2. Otherwise it calls its function tools in turn, once per turn, following
+   ``tool_plan`` where one is given for the agent. Hosted tools such as web
+   search are skipped. The coordinator assesses, dispatches and then
+   releases, so simulated callers do not exhaust the responder pool.
+3. Then it replies with text derived from the last tool output.
+
+Arguments are filled in from the tool's JSON schema with the caller's
+message. Each response waits ``latency`` seconds plus up to ``jitter``,
+drawn from a seeded generator. Use it through a RunConfig:
+
+    run_config = RunConfig(model_provider=ScriptedModelProvider(latency=0.2), tracing_disabled=True)
+"""
+
+import asyncio
+import json
+import random
+import uuid
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from agents import FunctionTool, Handoff, Model, ModelProvider, ModelResponse, ModelSettings, ModelTracing, Tool
+from agents.usage import Usage
+from openai.types.responses import (
+    Response,
+    ResponseCompletedEvent,
+    ResponseFunctionToolCall,
+    ResponseOutputMessage,
+    ResponseOutputText,
+    ResponseTextDeltaEvent,
+)
+
+from history import estimate_tokens
+
+# Tools called in this order by agents that have them; other agents call their first function tool
+DEFAULT_TOOL_PLAN: List[str] = ["assess_emergency_severity", "request_first_responder", "release_first_responders"]
+# Argument values that the caller's message cannot stand in for
+_ARGUMENT_HINTS: Dict[str, Any] = {"responder_type": "paramedic"}
+
+
+def _items(input) -> List[Dict[str, Any]]:
+    if isinstance(input, str):
+        return [{"role": "user", "content": input}]
+    return [item if isinstance(item, dict) else item.model_dump(exclude_unset=True) for item in input]
+
+
+def _text(content) -> str:
+    if isinstance(content, str):
+        return content
+    return " ".join(part.get("text", "") for part in content or [] if isinstance(part, dict))
+
+
+def _current_turn(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Items since the caller's last message, that message included"""
+    for index in range(len(items) - 1, -1, -1):
+        if items[index].get("role") == "user" and items[index].get("type", "message") == "message":
+            return items[index:]
+    return items
+
+
+def _arguments(tool: FunctionTool, message: str) -> str:
+    arguments = {}
+    for name, schema in tool.params_json_schema.get("properties", {}).items():
+        if name not in tool.params_json_schema.get("required", []):
+            continue
+        if name in _ARGUMENT_HINTS:
+            arguments[name] = _ARGUMENT_HINTS[name]
+            continue
+        kind = schema.get("type")
+        arguments[name] = {"integer": 1, "number": 1.0, "boolean": False}.get(kind, message)
+    return json.dumps(arguments)
+
+
+class ScriptedModel(Model):
+    """
+    Deterministic Model for offline runs.
+
+    Args:
+        latency: Seconds each response takes
+        jitter: Extra seconds, uniformly drawn up to this much
+        seed: Seed of the jitter
+        tool_plan: Order in which agents call the tools they have
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        seed: int = 0,
+        tool_plan: Optional[List[str]] = None,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.tool_plan = DEFAULT_TOOL_PLAN if tool_plan is None else tool_plan
+        self._random = random.Random(seed)
+        self._router = None
+
+    def _route(self, message: str) -> Optional[str]:
+        if self._router is None:
+            # Imported late: the agent graph imports the agents this model plays
+            from router import build_router
+
+            self._router = build_router()
+        decision = self._router.route(message)
+        return decision.agent.name if decision.fast_path else None
+
+    def _respond(
+        self, system_instructions: Optional[str], input, tools: List[Tool], handoffs: List[Handoff]
+    ) -> List[Any]:
+        turn = _current_turn(_items(input))
+        message = _text(turn[0].get("content")) if turn else ""
+        calls = {item["call_id"]: item["name"] for item in turn if item.get("type") == "function_call"}
+        called = list(calls.values())
+        handed_off = any(name.startswith("transfer_to_") for name in called)
+
+        if handoffs and not handed_off:
+            target = self._route(message)
+            for handoff in handoffs:
+                if handoff.agent_name == target:
+                    return [self._call(handoff.tool_name, "{}")]
+
+        function_tools = {tool.name: tool for tool in tools if isinstance(tool, FunctionTool)}
+        plan = [name for name in self.tool_plan if name in function_tools] or list(function_tools)[:1]
+        for name in plan:
+            if name in function_tools and name not in called:
+                return [self._call(name, _arguments(function_tools[name], message))]
+
+        outputs = [
+            item
+            for item in turn
+            if item.get("type") == "function_call_output" and not calls.get(item["call_id"], "").startswith("transfer_to_")
+        ]
+        reply = str(outputs[-1]["output"]) if outputs else f"I understand: {message}"
+        return [
+            ResponseOutputMessage(
+                id=f"msg_{uuid.uuid4().hex[:12]}",
+                content=[ResponseOutputText(annotations=[], text=reply[:500], type="output_text")],
+                role="assistant",
+                status="completed",
+                type="message",
+            )
+        ]
+
+    def _call(self, name: str, arguments: str) -> ResponseFunctionToolCall:
+        return ResponseFunctionToolCall(
+            arguments=arguments,
+            call_id=f"call_{uuid.uuid4().hex[:12]}",
+            name=name,
+            type="function_call",
+            id=f"fc_{uuid.uuid4().hex[:12]}",
+            status="completed",
+        )
+
+    def _usage(self, input, output: List[Any]) -> Usage:
+        input_tokens = estimate_tokens(_items(input))
+        output_tokens = estimate_tokens([item.model_dump() for item in output])
+        return Usage(
+            requests=1, input_tokens=input_tokens, output_tokens=output_tokens, total_tokens=input_tokens + output_tokens
+        )
+
+    async def _wait(self):
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay:
+            await asyncio.sleep(delay)
+
+    async def get_response(
+        self,
+        system_instructions: Optional[str],
+        input,
+        model_settings: ModelSettings,
+        tools: List[Tool],
+        output_schema,
+        handoffs: List[Handoff],
+        tracing: ModelTracing,
+        *,
+        previous_response_id: Optional[str] = None,
+        conversation_id: Optional[str] = None,
+        prompt=None,
+    ) -> ModelResponse:
+        await self._wait()
+        output = self._respond(system_instructions, input, tools, handoffs)
+        return ModelResponse(output=output, usage=self._usage(input, output), response_id=None)
+
+    async def stream_response(
+        self,
+        system_instructions: Optional[str],
+        input,
+        model_settings: ModelSettings,
+        tools: List[Tool],
+        output_schema,
+        handoffs: List[Handoff],
+        tracing: ModelTracing,
+        *,
+        previous_response_id: Optional[str] = None,
+        conversation_id: Optional[str] = None,
+        prompt=None,
+    ) -> AsyncIterator[Any]:
+        await self._wait()
+        output = self._respond(system_instructions, input, tools, handoffs)
+        sequence_number = 0
+        for item in output:
+            if isinstance(item, ResponseOutputMessage):
+                for word in item.content[0].text.split(" "):
+                    yield ResponseTextDeltaEvent(
+                        content_index=0,
+                        delta=f"{word} ",
+                        item_id=item.id,
+                        logprobs=[],
+                        output_index=0,
+                        sequence_number=sequence_number,
+                        type="response.output_text.delta",
+                    )
+                    sequence_number += 1
+        response = Response.model_construct(
+            id=f"resp_{uuid.uuid4().hex[:12]}",
+            output=output,
+            usage=None,
+            created_at=0,
+            model="scripted",
+            object="response",
+            tool_choice="auto",
+            tools=[],
+            parallel_tool_calls=False,
+        )
+        yield ResponseCompletedEvent(response=response, sequence_number=sequence_number, type="response.completed")
+
+
+class ScriptedModelProvider(ModelProvider):
+    """Serves one shared ScriptedModel for every model name"""
+
+    def __init__(self, **kwargs):
+        self.model = ScriptedModel(**kwargs)
+
+    def get_model(self, model_name: Optional[str]) -> Model:
+        return self.model
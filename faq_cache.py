@@ -0,0 +1,220 @@
+"""
+Answer cache in front of faq_agent.
+
+Callers in one incident keep asking the same questions, and each one costs a
+faq_agent run with a tool call. FAQCache keeps recent answers keyed on the
+normalized question and the fingerprint of the disaster timeline that was
+current when they were produced, so news invalidates them automatically.
+
+Questions match when their normalized forms are equal, e.g. "Are the flights
+cancelled?" and "are flights cancelled", or when their character shingles
+overlap enough, e.g. "are flights cancelled today" and "are flights canceled
+today". Normalizing drops only articles and keeps word order, question
+words and prepositions, which the search stopwords drop: "When will the
+airport reopen?" and "Will the airport reopen?", or flights "to Paris from
+London" and "from Paris to London", need different answers. Similar
+questions must therefore line up word for word: the same function words in
+the same places, and other words differing only in spelling.
+"""
+
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import FrozenSet, Optional, Sequence
+
+from news_index import tokenize
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+# Only words that never change what is asked
+_KEY_STOPWORDS = frozenset("a an please the".split())
+# Words that change the question however close the rest is
+_FUNCTION_WORDS = frozenset(
+    "about after and are at before between by can could did do does during for from has have how in into is may "
+    "might must near not of off on or out over shall should since through to under until was were what when "
+    "where which who why will with without would".split()
+)
+# Shingle overlap at which two aligned words count as spellings of one word
+_WORD_SIMILARITY = 0.5
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase, drop punctuation and articles, keeping word order"""
+    return " ".join(token for token in _TOKEN_RE.findall(question.lower()) if token not in _KEY_STOPWORDS)
+
+
+def aligned(a: Sequence[str], b: Sequence[str]) -> bool:
+    """Whether two normalized questions match word for word, up to spelling"""
+    if len(a) != len(b):
+        return False
+    for first, second in zip(a, b):
+        if first == second:
+            continue
+        if first in _FUNCTION_WORDS or second in _FUNCTION_WORDS:
+            return False
+        if jaccard(shingles(first), shingles(second)) < _WORD_SIMILARITY:
+            return False
+    return True
+
+
+def is_cacheable(question: str) -> bool:
+    """Short follow-ups like "and tomorrow?" depend on the conversation, not just the timeline"""
+    return len(set(tokenize(question))) >= 2
+
+
+def shingles(text: str, n: int = 3) -> FrozenSet[str]:
+    padded = f" {text} "
+    return frozenset(padded[i : i + n] for i in range(max(len(padded) - n + 1, 1)))
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+@dataclass
+class _CacheEntry:
+    answer: str
+    shingles: FrozenSet[str]
+    words: Sequence[str]
+    created: float
+
+
+@dataclass
+class FAQCacheStats:
+    hits: int = 0
+    similar_hits: int = 0
+    misses: int = 0
+    stored: int = 0
+    evicted: int = 0
+    expired: int = 0
+    invalidated: int = 0
+
+    @property
+    def lookups(self) -> int:
+        return self.hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    @property
+    def model_calls_avoided(self) -> int:
+        return self.hits
+
+
+class FAQCache:
+    """
+    LRU cache of FAQ answers with a time to live.
+
+    Args:
+        max_entries: Least recently used answers are evicted beyond this
+        ttl: Seconds an answer is served for, None to keep it until evicted
+        similarity: Shingle overlap (Jaccard) at which a differently spelled
+            question that lines up word for word reuses an answer, None for
+            exact matches only
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: Optional[float] = 900.0, similarity: Optional[float] = 0.8):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity = similarity
+        self.stats = FAQCacheStats()
+        self._entries: "OrderedDict[tuple[str, str], _CacheEntry]" = OrderedDict()
+        self._fingerprint: Optional[str] = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _expired(self, entry: _CacheEntry, now: float) -> bool:
+        return self.ttl is not None and now - entry.created > self.ttl
+
+    def get(self, question: str, fingerprint: str) -> Optional[str]:
+        """
+        Look up an answer produced from the same timeline
+
+        Args:
+            question: The caller's question
+            fingerprint: EventStore.fingerprint of the caller's timeline
+
+        Returns:
+            Optional[str]: The cached answer, or None on a miss
+        """
+        now = time.monotonic()
+        normalized = normalize_question(question)
+        key = (fingerprint, normalized)
+        entry = self._entries.get(key)
+        similar = False
+
+        if entry is None and self.similarity is not None and normalized:
+            # Few entries share a timeline, so a scan is cheap
+            question_shingles = shingles(normalized)
+            words = normalized.split()
+            best = 0.0
+            for (entry_fingerprint, entry_question), candidate in self._entries.items():
+                if entry_fingerprint != fingerprint or self._expired(candidate, now):
+                    continue
+                score = jaccard(question_shingles, candidate.shingles)
+                if score >= self.similarity and score > best and aligned(words, candidate.words):
+                    key, entry, best = (entry_fingerprint, entry_question), candidate, score
+            similar = entry is not None
+
+        if entry is not None and self._expired(entry, now):
+            del self._entries[key]
+            self.stats.expired += 1
+            entry = None
+
+        if entry is None:
+            self.stats.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats.hits += 1
+        self.stats.similar_hits += similar
+        return entry.answer
+
+    def put(self, question: str, fingerprint: str, answer: str):
+        """Store an answer produced from the timeline with this fingerprint"""
+        if fingerprint != self._fingerprint:
+            # The timeline moved on, answers from older versions are stale
+            stale = [key for key in self._entries if key[0] != fingerprint]
+            for key in stale:
+                del self._entries[key]
+            self.stats.invalidated += len(stale)
+            self._fingerprint = fingerprint
+
+        normalized = normalize_question(question)
+        self._entries[(fingerprint, normalized)] = _CacheEntry(
+            answer, shingles(normalized), tuple(normalized.split()), time.monotonic()
+        )
+        self._entries.move_to_end((fingerprint, normalized))
+        self.stats.stored += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evicted += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._fingerprint = None
+
+
+def test_faq_cache():
+    cache = FAQCache(max_entries=2)
+    cache.put("Are flights cancelled today?", "v1", "Yes, most are.")
+    assert cache.get("are the flights cancelled today", "v1") == "Yes, most are."
+    assert cache.get("are flights canceled today?", "v1") == "Yes, most are."
+    assert cache.stats.similar_hits == 1
+    # News changed the timeline
+    assert cache.get("Are flights cancelled today?", "v2") is None
+    cache.put("Are flights cancelled today?", "v2", "Flights are resuming.")
+    assert cache.stats.invalidated == 1
+    cache.put("When will the airport reopen?", "v2", "Tomorrow.")
+    cache.put("Is there an evacuation?", "v2", "Not at the moment.")
+    assert len(cache) == 2 and cache.get("Are flights cancelled today?", "v2") is None
+    # Different questions about the same thing
+    assert cache.get("Will the airport reopen?", "v2") is None
+    assert cache.get("When will the airport reopen", "v2") == "Tomorrow."
+
+    # Word order and prepositions carry the meaning
+    cache.put("Are flights to Paris from London cancelled?", "v2", "Yes.")
+    assert cache.get("Are flights from Paris to London cancelled?", "v2") is None
+    assert cache.get("Are flights from London to Paris cancelled?", "v2") is None
+    assert cache.get("Are the flights to Paris from London canceled?", "v2") == "Yes."
@@ -0,0 +1,298 @@
+"""
+First-aid knowledge base behind medical_info_lookup_tool.
+
+personal_care_agent used to run a web search for every medical question,
+which takes seconds. The articles in first_aid.json are compiled once into
+a binary inverted index, first_aid.idx, which is rebuilt whenever the JSON
+is newer. FirstAidKB memory-maps the index, so opening it costs nothing and
+a lookup touches only the postings of its query terms. Questions are ranked
+with BM25, the same scoring NewsIndex uses for the disaster timeline.
+
+Index layout, little-endian:
+
+    header    magic, version, document count, term count, average length,
+              offset of the term strings
+    documents (text offset, text length, token count) per article
+    terms     (string offset, string length, postings offset, postings count),
+              sorted by term for binary search
+    strings   the terms, UTF-8
+    postings  (document, term frequency) pairs
+    texts     the rendered articles, UTF-8
+"""
+
+import json
+import math
+import mmap
+import os
+import struct
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from news_index import tokenize
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "first_aid.json")
+
+_MAGIC = b"FAKB"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHHIIfQ")
+_DOCUMENT = struct.Struct("<QII")
+_TERM = struct.Struct("<IHQI")
+_POSTING = struct.Struct("<IH")
+
+_SUFFIXES = ("ing", "es", "ed", "s")
+# Words in most questions and articles that say nothing about the injury
+_GENERIC = frozenset("aid first get give got help need please should someone something tell think".split())
+
+
+def terms(text: str) -> List[str]:
+    """
+    Index terms of a text: stemmed words and pairs of adjacent ones
+
+    Suffixes are stripped so "burns" and "bleeding" match "burn" and
+    "bleed"; the pairs rank phrases such as "not breathing" above articles
+    that merely contain both words.
+    """
+    stemmed = []
+    for token in tokenize(text):
+        if token in _GENERIC:
+            continue
+        for suffix in _SUFFIXES:
+            if len(token) > len(suffix) + 3 and token.endswith(suffix):
+                token = token[: -len(suffix)]
+                break
+        stemmed.append(token)
+    return stemmed + [f"{first} {second}" for first, second in zip(stemmed, stemmed[1:])]
+
+
+def render_article(article: Dict[str, str]) -> str:
+    return f"### {article['title']}\n{article['text']}"
+
+
+def build_index(articles: Sequence[Dict[str, str]], path: str):
+    """
+    Compile articles into an index file
+
+    Args:
+        articles: Dicts with a title, text and optionally keywords
+        path: Index file to write, replaced atomically
+    """
+    texts = [render_article(article).encode() for article in articles]
+    postings: Dict[str, List[Tuple[int, int]]] = {}
+    lengths = []
+    for doc_id, article in enumerate(articles):
+        # The title counts twice, it says best what an article is about
+        counts = Counter(terms(f"{article['title']} {article['title']} {article.get('keywords', '')} {article['text']}"))
+        lengths.append(sum(counts.values()))
+        for term, count in counts.items():
+            postings.setdefault(term, []).append((doc_id, min(count, 0xFFFF)))
+
+    sorted_terms = sorted(postings, key=lambda term: term.encode())
+    strings = b"".join(term.encode() for term in sorted_terms)
+    documents_offset = _HEADER.size
+    terms_offset = documents_offset + _DOCUMENT.size * len(articles)
+    strings_offset = terms_offset + _TERM.size * len(sorted_terms)
+    postings_offset = strings_offset + len(strings)
+    texts_offset = postings_offset + _POSTING.size * sum(len(entries) for entries in postings.values())
+
+    body = bytearray()
+    text_offset = texts_offset
+    for text, length in zip(texts, lengths):
+        body += _DOCUMENT.pack(text_offset, len(text), length)
+        text_offset += len(text)
+    string_offset = 0
+    posting_offset = postings_offset
+    for term in sorted_terms:
+        encoded = term.encode()
+        body += _TERM.pack(string_offset, len(encoded), posting_offset, len(postings[term]))
+        string_offset += len(encoded)
+        posting_offset += _POSTING.size * len(postings[term])
+    body += strings
+    for term in sorted_terms:
+        for doc_id, count in postings[term]:
+            body += _POSTING.pack(doc_id, count)
+    body += b"".join(texts)
+
+    average_length = sum(lengths) / len(lengths) if lengths else 0.0
+    header = _HEADER.pack(_MAGIC, _VERSION, 0, len(articles), len(sorted_terms), average_length, strings_offset)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(body)
+    os.replace(tmp_path, path)
+
+
+@dataclass
+class FirstAidCacheStats:
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / (self.hits + self.misses) if self.hits + self.misses else 0.0
+
+
+class FirstAidKB:
+    """
+    Memory-mapped first-aid index with an LRU cache of lookups.
+
+    Args:
+        path: Index file written by build_index()
+        cache_size: Lookups remembered, least recently used are evicted
+        k1, b: BM25 parameters
+    """
+
+    def __init__(self, path: str, cache_size: int = 1024, k1: float = 1.2, b: float = 0.75):
+        self.path = path
+        self.cache_size = cache_size
+        self.k1 = k1
+        self.b = b
+        self.stats = FirstAidCacheStats()
+        self._cache: "OrderedDict[Tuple[str, int, float], Optional[str]]" = OrderedDict()
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < _HEADER.size:
+                # Also covers an empty file, which mmap refuses
+                raise ValueError(f"{path} is truncated")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, self.n_documents, self.n_terms, self.average_length, self._strings_offset = (
+            _HEADER.unpack_from(self._map, 0)
+        )
+        if magic != _MAGIC or version != _VERSION:
+            self._map.close()
+            raise ValueError(f"{path} is not a version {_VERSION} first-aid index")
+        self._terms_offset = _HEADER.size + _DOCUMENT.size * self.n_documents
+
+    @classmethod
+    def open(cls, corpus: str = DEFAULT_CORPUS, index: Optional[str] = None, **kwargs) -> "FirstAidKB":
+        """Open the index of a JSON corpus, building it first if it is missing or older than the corpus"""
+        index = index if index is not None else os.path.splitext(corpus)[0] + ".idx"
+        if os.path.exists(index) and os.path.getmtime(index) >= os.path.getmtime(corpus):
+            try:
+                return cls(index, **kwargs)
+            except ValueError:
+                # Written by an older version, or truncated
+                pass
+        with open(corpus, "r") as f:
+            build_index(json.load(f)["articles"], index)
+        return cls(index, **kwargs)
+
+    def __len__(self):
+        return self.n_documents
+
+    def close(self):
+        self._map.close()
+
+    def _postings(self, term: str) -> List[Tuple[int, int]]:
+        """Binary search of the sorted term table"""
+        encoded = term.encode()
+        low, high = 0, self.n_terms
+        while low < high:
+            middle = (low + high) // 2
+            string_offset, string_length, postings_offset, count = _TERM.unpack_from(
+                self._map, self._terms_offset + middle * _TERM.size
+            )
+            start = self._strings_offset + string_offset
+            candidate = self._map[start : start + string_length]
+            if candidate == encoded:
+                return list(_POSTING.iter_unpack(self._map[postings_offset : postings_offset + count * _POSTING.size]))
+            if candidate < encoded:
+                low = middle + 1
+            else:
+                high = middle
+        return []
+
+    def _document(self, doc_id: int) -> Tuple[int, int, int]:
+        return _DOCUMENT.unpack_from(self._map, _HEADER.size + doc_id * _DOCUMENT.size)
+
+    def article(self, doc_id: int) -> str:
+        offset, length, _ = self._document(doc_id)
+        return self._map[offset : offset + length].decode()
+
+    def search(self, query: str, k: int = 2) -> List[Tuple[int, float]]:
+        """Return up to k (article id, BM25 score) pairs, best first"""
+        if not self.n_documents:
+            return []
+        scores: Dict[int, float] = {}
+        lengths: Dict[int, int] = {}
+        for term in set(terms(query)):
+            postings = self._postings(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (self.n_documents - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, count in postings:
+                if doc_id not in lengths:
+                    lengths[doc_id] = self._document(doc_id)[2]
+                norm = self.k1 * (1 - self.b + self.b * lengths[doc_id] / self.average_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * count * (self.k1 + 1) / (count + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+    def lookup(self, question: str, k: int = 2, min_score: float = 2.5) -> Optional[str]:
+        """
+        The articles that best answer a question
+
+        Args:
+            question: Description of the injury or situation
+            k: Articles returned at most
+            min_score: BM25 score an article needs, below it is not relevant.
+                Articles after the first also need half the first one's score.
+
+        Returns:
+            Optional[str]: The articles as markdown, or None when none is relevant
+        """
+        key = (" ".join(sorted(set(terms(question)))), k, min_score)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            self.stats.hits += 1
+            return self._cache[key]
+        self.stats.misses += 1
+
+        results = self.search(question, k)
+        cutoff = max(min_score, results[0][1] / 2) if results else min_score
+        articles = [self.article(doc_id) for doc_id, score in results if score >= cutoff]
+        answer = "\n\n".join(articles) if articles else None
+        self._cache[key] = answer
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return answer
+
+
+_knowledge_base: Optional[FirstAidKB] = None
+
+
+def first_aid_kb() -> FirstAidKB:
+    """The process-wide knowledge base, opened on first use"""
+    global _knowledge_base
+    if _knowledge_base is None:
+        _knowledge_base = FirstAidKB.open()
+    return _knowledge_base
+
+
+def test_first_aid_kb():
+    import tempfile
+
+    with open(DEFAULT_CORPUS, "r") as f:
+        articles = json.load(f)["articles"]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "first_aid.idx")
+        build_index(articles, path)
+        kb = FirstAidKB(path)
+        assert len(kb) == len(articles)
+        assert kb.lookup("My son got a burn from the hot ash").startswith("### Burns")
+        assert kb.lookup("I think my arm is broken").startswith("### Broken bones")
+        assert "### Ash or debris in the eyes" in kb.lookup("I got ash in my eyes, what do I do?")
+        assert kb.lookup("When will the airport reopen?") is None
+        kb.lookup("my arm is broken I think")
+        assert kb.stats.hits == 1
+        kb.close()
+
+        # A truncated index is rebuilt
+        corpus = os.path.join(tmp_dir, "first_aid.json")
+        with open(corpus, "w") as f:
+            json.dump({"articles": articles}, f)
+        for size in (0, 10):
+            with open(path, "r+b") as f:
+                f.truncate(size)
+            os.utime(corpus, (0, 0))
+            kb = FirstAidKB.open(corpus, path)
+            assert len(kb) == len(articles)
+            kb.close()
@@ -0,0 +1,182 @@
+"""
+Hop budget and cycle detection for handoffs within one turn.
+
+Every agent of the graph can hand off to every other one, and each hop is
+another model call before the caller hears anything. HandoffGovernor wraps
+the handoffs of the graph and follows the chain of agents of each turn:
+
+- after ``max_hops`` handoffs, none are offered; the agent holding the turn answers
+- a handoff back to an agent already in the chain (faq -> triage -> faq) is
+  never offered
+- with a ``terminal`` agent, the last hop of the budget can only go there
+
+Disabled handoffs are simply left out of the tools the model sees, so a turn
+is never cut short. Each hop is counted per edge, with the time the turn
+spent in the source agent before handing off, which is the latency the hop
+added. Blocked handoffs are counted by reason.
+"""
+
+import time
+import weakref
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from agents import Agent, Handoff, RunContextWrapper, handoff
+
+BUDGET = "budget"
+CYCLE = "cycle"
+TERMINAL = "terminal"
+
+
+@dataclass
+class _Chain:
+    """The agents a turn went through, starting with the one it started at"""
+
+    agents: List[str]
+    last_hop: float
+    blocked: Set[Tuple[str, str, str]] = field(default_factory=set)
+
+    @property
+    def hops(self) -> int:
+        return len(self.agents) - 1
+
+
+@dataclass
+class EdgeStats:
+    count: int = 0
+    seconds: float = 0.0
+
+
+class HandoffGovernor:
+    """
+    Limits the handoffs of a turn.
+
+    Args:
+        max_hops: Handoffs allowed per turn
+        terminal: Agent the last allowed hop must go to, None to allow any
+        block_cycles: Never hand off to an agent already visited in the turn
+        registry: Optional MetricsRegistry for handoff_seconds by edge and
+            handoffs_blocked by reason
+    """
+
+    def __init__(
+        self,
+        max_hops: int = 2,
+        terminal: Optional[Agent] = None,
+        block_cycles: bool = True,
+        registry=None,
+    ):
+        self.max_hops = max_hops
+        self.terminal = terminal
+        self.block_cycles = block_cycles
+        self.registry = registry
+        self.edges: Dict[Tuple[str, str], EdgeStats] = defaultdict(EdgeStats)
+        self.blocked: Dict[str, int] = defaultdict(int)
+        # Keyed by the id of the run's RunContextWrapper, which lives for one turn
+        self._chains: Dict[int, _Chain] = {}
+
+    def _chain(self, context: RunContextWrapper, agent: Agent) -> _Chain:
+        key = id(context)
+        chain = self._chains.get(key)
+        if chain is None:
+            chain = self._chains[key] = _Chain([agent.name], time.perf_counter())
+            weakref.finalize(context, self._chains.pop, key, None)
+        return chain
+
+    def _block_reason(self, chain: _Chain, target: Agent) -> Optional[str]:
+        if chain.hops >= self.max_hops:
+            return BUDGET
+        if self.block_cycles and target.name in chain.agents:
+            return CYCLE
+        if self.terminal is not None and chain.hops == self.max_hops - 1 and target is not self.terminal:
+            return TERMINAL
+        return None
+
+    def allows(self, context: RunContextWrapper, source: Agent, target: Agent) -> bool:
+        """Whether source may hand off to target at this point of the turn"""
+        chain = self._chain(context, source)
+        reason = self._block_reason(chain, target)
+        if reason is None:
+            return True
+        # Checked before every model call; count each blocked edge once per turn
+        if (source.name, target.name, reason) not in chain.blocked:
+            chain.blocked.add((source.name, target.name, reason))
+            self.blocked[reason] += 1
+            if self.registry is not None:
+                self.registry.increment("handoffs_blocked", reason=reason, source=source.name, target=target.name)
+        return False
+
+    def record(self, context: RunContextWrapper, source: Agent, target: Agent):
+        """Count a hop and the time the turn spent in source before it"""
+        chain = self._chain(context, source)
+        now = time.perf_counter()
+        elapsed = now - chain.last_hop
+        chain.agents.append(target.name)
+        chain.last_hop = now
+        edge = self.edges[(source.name, target.name)]
+        edge.count += 1
+        edge.seconds += elapsed
+        if self.registry is not None:
+            self.registry.observe("handoff_seconds", elapsed, source=source.name, target=target.name)
+
+    def handoff(self, source: Agent, target: Agent) -> Handoff:
+        """A governed handoff from source to target"""
+        return handoff(
+            target,
+            on_handoff=lambda context: self.record(context, source, target),
+            is_enabled=lambda context, agent: self.allows(context, source, target),
+        )
+
+    def govern(self, agents: Iterable[Agent]):
+        """Replace the plain agent handoffs of every agent with governed ones"""
+        for agent in agents:
+            agent.handoffs = [
+                self.handoff(agent, target) if isinstance(target, Agent) else target for target in agent.handoffs
+            ]
+
+    def report(self) -> List[str]:
+        """One line per edge, most expensive first, then the blocked handoffs"""
+        lines = [
+            f"{source} -> {target}: {edge.count} hops, {edge.seconds / edge.count * 1000:.0f} ms avg"
+            for (source, target), edge in sorted(self.edges.items(), key=lambda item: item[1].seconds, reverse=True)
+        ]
+        lines += [f"blocked by {reason}: {count}" for reason, count in sorted(self.blocked.items())]
+        return lines
+
+
+def test_handoff_governor_blocks_cycles():
+    """A model that always hands off back and forth still answers within the budget"""
+    import asyncio
+
+    from agents import RunConfig, Runner
+
+    from context import AgentContext
+    from fake_model import ScriptedModel, ScriptedModelProvider
+
+    class BouncingModel(ScriptedModel):
+        def _route(self, message: str) -> Optional[str]:
+            return None
+
+        def _respond(self, system_instructions, input, tools, handoffs):
+            if handoffs:
+                return [self._call(handoffs[0].tool_name, "{}")]
+            return super()._respond(system_instructions, input, [], [])
+
+    first, second, third = (Agent(name=name, instructions="Help.") for name in ("First", "Second", "Third"))
+    first.handoffs = [second, third]
+    second.handoffs = [first, third]
+    third.handoffs = [first, second]
+    governor = HandoffGovernor(max_hops=2)
+    governor.govern([first, second, third])
+
+    provider = ScriptedModelProvider()
+    provider.model = BouncingModel()
+    run_config = RunConfig(model_provider=provider, tracing_disabled=True)
+    result = asyncio.run(Runner.run(first, "Hello?", context=AgentContext(), run_config=run_config, max_turns=10))
+
+    # First -> Second, Second may not go back to First, so -> Third, which is out of budget
+    assert result.last_agent is third
+    assert set(governor.edges) == {("First", "Second"), ("Second", "Third")}
+    assert all(edge.count == 1 for edge in governor.edges.values())
+    assert governor.blocked[CYCLE] == 1 and governor.blocked[BUDGET] == 2
@@ -0,0 +1,197 @@
+"""
+Keeps the conversation history sent to the model bounded.
+
+main.main() re-sends `result.to_input_list()` every turn, including every tool
+output, so each turn costs more than the last. HistoryManager.compact runs
+between turns:
+
+1. Outputs of a read-only lookup that has since been repeated with the same
+   arguments are replaced by a stub, e.g. the first answer to a question asked
+   twice. Outputs of actions such as dispatches, and of lookups for anything
+   else, stay: they are facts the model still needs.
+2. Once the history exceeds the token budget, turns older than the most recent
+   few are folded into a rolling digest message; recent turns stay verbatim.
+"""
+
+import json
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from agents import TResponseInputItem
+
+_DIGEST_PREFIX = "Summary of the earlier conversation:"
+_SUPERSEDED_OUTPUT = "[Output omitted: superseded by a later call to {name}]"
+
+# Tools without side effects, whose latest output replaces earlier ones for the same arguments
+LOOKUP_TOOLS = frozenset(("general_info_lookup_tool", "medical_info_lookup_tool", "assess_emergency_severity"))
+
+
+def estimate_tokens(items: List[TResponseInputItem]) -> int:
+    """Rough token count of input items, at about 4 characters per token"""
+    return sum(len(json.dumps(item, default=str)) for item in items) // 4
+
+
+@dataclass
+class CompactionReport:
+    tokens_before: int
+    tokens_after: int
+    stubbed_outputs: int
+    summarized_turns: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+
+def _is_user_message(item: TResponseInputItem) -> bool:
+    return item.get("role") == "user" and item.get("type", "message") == "message"
+
+
+def _is_digest(item: TResponseInputItem) -> bool:
+    content = item.get("content")
+    return item.get("role") == "system" and isinstance(content, str) and content.startswith(_DIGEST_PREFIX)
+
+
+def _message_text(item: TResponseInputItem) -> str:
+    content = item.get("content")
+    if isinstance(content, str):
+        return content
+    return " ".join(part.get("text", "") for part in content or [] if isinstance(part, dict))
+
+
+def _normalize_arguments(arguments: str) -> str:
+    """Arguments as canonical JSON, so key order and spacing do not matter"""
+    try:
+        return json.dumps(json.loads(arguments), sort_keys=True)
+    except (TypeError, ValueError):
+        return arguments
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[: limit - 3] + "..."
+
+
+class HistoryManager:
+    """
+    Compacts input items between turns.
+
+    Args:
+        token_budget: Estimated tokens above which older turns are summarized
+        keep_recent_turns: Turns (user message onwards) always kept verbatim
+        digest_line_chars: Length each message is clipped to in the digest
+        max_digest_chars: The digest drops its oldest lines beyond this size
+        lookup_tools: Tools whose outputs are stubbed once called again with the same arguments
+    """
+
+    def __init__(
+        self,
+        token_budget: int = 4000,
+        keep_recent_turns: int = 3,
+        digest_line_chars: int = 200,
+        max_digest_chars: int = 4000,
+        lookup_tools: FrozenSet[str] = LOOKUP_TOOLS,
+    ):
+        self.token_budget = token_budget
+        self.keep_recent_turns = keep_recent_turns
+        self.digest_line_chars = digest_line_chars
+        self.max_digest_chars = max_digest_chars
+        self.lookup_tools = lookup_tools
+
+    def compact(self, items: List[TResponseInputItem]) -> Tuple[List[TResponseInputItem], CompactionReport]:
+        tokens_before = estimate_tokens(items)
+        items, stubbed = self._stub_superseded_outputs(items)
+
+        summarized = 0
+        if estimate_tokens(items) > self.token_budget:
+            items, summarized = self._summarize_old_turns(items)
+
+        return items, CompactionReport(tokens_before, estimate_tokens(items), stubbed, summarized)
+
+    def _stub_superseded_outputs(self, items: List[TResponseInputItem]) -> Tuple[List[TResponseInputItem], int]:
+        call_keys: Dict[str, Tuple[str, str]] = {}
+        latest_call: Dict[Tuple[str, str], str] = {}
+        for item in items:
+            if item.get("type") == "function_call" and item["name"] in self.lookup_tools:
+                key = (item["name"], _normalize_arguments(item.get("arguments", "")))
+                call_keys[item["call_id"]] = key
+                latest_call[key] = item["call_id"]
+
+        compacted = []
+        stubbed = 0
+        for item in items:
+            if item.get("type") == "function_call_output" and item["call_id"] in call_keys:
+                key = call_keys[item["call_id"]]
+                stub = _SUPERSEDED_OUTPUT.format(name=key[0])
+                if latest_call[key] != item["call_id"] and item["output"] != stub:
+                    item = {**item, "output": stub}
+                    stubbed += 1
+            compacted.append(item)
+        return compacted, stubbed
+
+    def _summarize_old_turns(self, items: List[TResponseInputItem]) -> Tuple[List[TResponseInputItem], int]:
+        digest: Optional[str] = None
+        turns: List[List[TResponseInputItem]] = []
+        for item in items:
+            if _is_digest(item):
+                digest = item["content"][len(_DIGEST_PREFIX) :].strip()
+            elif _is_user_message(item) or not turns:
+                turns.append([item])
+            else:
+                turns[-1].append(item)
+
+        old_turns, recent_turns = turns[: -self.keep_recent_turns], turns[-self.keep_recent_turns :]
+        if not old_turns:
+            return items, 0
+
+        lines = digest.splitlines() if digest else []
+        for turn in old_turns:
+            lines.extend(self._summarize_turn(turn))
+        while lines and sum(len(line) + 1 for line in lines) > self.max_digest_chars:
+            lines.pop(0)
+
+        compacted: List[TResponseInputItem] = [{"role": "system", "content": f"{_DIGEST_PREFIX}\n" + "\n".join(lines)}]
+        for turn in recent_turns:
+            compacted.extend(turn)
+        return compacted, len(old_turns)
+
+    def _summarize_turn(self, turn: List[TResponseInputItem]) -> List[str]:
+        lines = []
+        tools = []
+        for item in turn:
+            if item.get("type") == "function_call":
+                tools.append(item["name"])
+            elif _is_user_message(item):
+                lines.append(f"- User: {_clip(_message_text(item), self.digest_line_chars)}")
+            elif item.get("role") == "assistant":
+                lines.append(f"- Assistant: {_clip(_message_text(item), self.digest_line_chars)}")
+        if tools:
+            lines.append(f"- Tools used: {', '.join(tools)}")
+        return lines
+
+
+def test_stub_superseded_outputs():
+    def call(call_id: str, name: str, arguments: str, output: str) -> List[TResponseInputItem]:
+        return [
+            {"type": "function_call", "call_id": call_id, "name": name, "arguments": arguments},
+            {"type": "function_call_output", "call_id": call_id, "output": output},
+        ]
+
+    items = (
+        call("1", "request_first_responder", '{"responder_type": "paramedic"}', "First responder dispatched.")
+        + call("2", "request_first_responder", '{"responder_type": "paramedic"}', "First responder dispatched.")
+        + call("3", "general_info_lookup_tool", '{"question": "Where are the shelters?"}', "Shelters: old answer")
+        + call("4", "general_info_lookup_tool", '{"question": "Is the airport open?"}', "The airport is closed")
+        + call("5", "general_info_lookup_tool", '{ "question":"Where are the shelters?"}', "Shelters: new answer")
+    )
+    compacted, report = HistoryManager().compact(items)
+    outputs = [item["output"] for item in compacted if item["type"] == "function_call_output"]
+    # Both dispatches happened and the other question still has its answer
+    assert outputs == [
+        "First responder dispatched.",
+        "First responder dispatched.",
+        _SUPERSEDED_OUTPUT.format(name="general_info_lookup_tool"),
+        "The airport is closed",
+        "Shelters: new answer",
+    ]
+    assert report.stubbed_outputs == 1
@@ -0,0 +1,201 @@
+"""
+Background news ingestion, decoupled from agent turns.
+
+The disaster timeline used to advance only when an agent called
+fake_news_feed_tool, costing a model round-trip per tick. NewsIngestor instead
+polls feed sources on a schedule and publishes new events into every live
+context:
+
+    ingestor = NewsIngestor([FakeNewsSource()], lambda: [context])
+    async with ingestor:
+        ...
+
+Each source is polled by its own task and feeds a bounded queue, so a slow
+publisher makes the pollers wait instead of piling up events. The publisher
+drains the queue in batches.
+"""
+
+import asyncio
+import glob
+import os
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional
+
+from context import AgentContext
+from events import DisasterEvent, EventStore, parse_timeline
+from shared_state import shared_timeline
+
+
+class FeedSource(ABC):
+    """A source of disaster events, polled by NewsIngestor"""
+
+    name = "feed"
+
+    @abstractmethod
+    async def poll(self) -> List[DisasterEvent]:
+        """Return the events that arrived since the last poll"""
+
+
+def parse_feed_text(text: str) -> List[DisasterEvent]:
+    """
+    Parse events from a markdown timeline or from blank-line separated news items
+
+    Returns:
+        List[DisasterEvent]: The events, skipping blocks that are not events
+    """
+    if text.lstrip().startswith("- ") or "\n- " in text:
+        return parse_timeline(text)
+    blocks = (DisasterEvent.parse(block) for block in text.split("\n\n"))
+    return [event for event in blocks if event is not None]
+
+
+class DirectoryFeedSource(FeedSource):
+    """
+    Watches a directory for news files.
+
+    Files matching ``pattern`` are read from where the previous poll stopped,
+    up to their last blank line, so items still being written are picked up
+    on a later poll.
+    """
+
+    name = "directory"
+
+    def __init__(self, directory: str, pattern: str = "*.md"):
+        self.directory = directory
+        self.pattern = pattern
+        self._offsets: Dict[str, int] = {}
+
+    async def poll(self) -> List[DisasterEvent]:
+        # File reads block, so they run off the event loop
+        return await asyncio.to_thread(self._read_new)
+
+    def _read_new(self) -> List[DisasterEvent]:
+        events = []
+        for path in sorted(glob.glob(os.path.join(self.directory, self.pattern))):
+            offset = self._offsets.get(path, 0)
+            try:
+                if os.path.getsize(path) <= offset:
+                    continue
+                with open(path, "rb") as f:
+                    f.seek(offset)
+                    data = f.read()
+            except OSError:
+                continue
+
+            end = data.rfind(b"\n\n")
+            if end < 0:
+                continue
+            self._offsets[path] = offset + end + 2
+            events.extend(parse_feed_text(data[:end].decode("utf-8", errors="replace")))
+        return events
+
+
+@dataclass
+class IngestionStats:
+    polled: int = 0
+    published_batches: int = 0
+    published_events: int = 0
+    errors: int = 0
+
+
+class NewsIngestor:
+    """
+    Polls feed sources and publishes their events to live contexts.
+
+    Args:
+        sources: Feed sources, each polled every ``poll_interval`` seconds
+        contexts: Returns the contexts to publish to, called for every batch
+        poll_interval: Seconds between polls of a source
+        max_queue: Events buffered before pollers wait for the publisher
+        batch_size: Most events published at once
+        batch_window: Seconds the publisher waits to fill a batch
+
+    Published events are also kept in ``events`` so that contexts created
+    later can be caught up with seed().
+    """
+
+    def __init__(
+        self,
+        sources: List[FeedSource],
+        contexts: Callable[[], Iterable[AgentContext]],
+        poll_interval: float = 15.0,
+        max_queue: int = 256,
+        batch_size: int = 32,
+        batch_window: float = 0.5,
+    ):
+        self.sources = sources
+        self.contexts = contexts
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.stats = IngestionStats()
+        self.events = EventStore()
+        self._queue: "asyncio.Queue[DisasterEvent]" = asyncio.Queue(maxsize=max_queue)
+        self._tasks: List[asyncio.Task] = []
+
+    async def _poll_source(self, source: FeedSource):
+        while True:
+            try:
+                events = await source.poll()
+            except Exception as e:
+                self.stats.errors += 1
+                print(f"[INGEST] {source.name} poll failed: {e}")
+                events = []
+            self.stats.polled += len(events)
+            for event in events:
+                # Waits while the queue is full
+                await self._queue.put(event)
+            await asyncio.sleep(self.poll_interval)
+
+    async def _publish(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            self.publish(batch)
+
+    def publish(self, events: List[DisasterEvent], received_at: Optional[float] = None):
+        """Add a batch of events to every live context, and to the shared timeline if there is one"""
+        received_at = time.time() if received_at is None else received_at
+        self.events.extend(events, received_at)
+        timeline = shared_timeline()
+        if timeline is not None:
+            timeline.publish(events, received_at)
+        for context in self.contexts():
+            context.events.extend(events, received_at)
+        self.stats.published_batches += 1
+        self.stats.published_events += len(events)
+
+    def seed(self, context: AgentContext) -> AgentContext:
+        """Add every event published so far to a new context"""
+        context.events.extend(list(self.events))
+        return context
+
+    def start(self):
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._poll_source(source)) for source in self.sources]
+        self._tasks.append(asyncio.create_task(self._publish()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
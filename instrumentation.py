@@ -0,0 +1,327 @@
+"""
+Local metrics for the run loop, without an external tracing service.
+
+RunMetrics is a RunHooks implementation: pass it as ``hooks`` to Runner.run
+or Runner.run_streamed and it records, in in-process histograms,
+
+- turn_seconds: a whole turn, from the first agent starting to the final output
+- model_seconds: each model call, by agent
+- tool_seconds: each function tool call, by tool
+- turn_handoffs: handoffs within a turn
+- turn_input_tokens / turn_output_tokens: tokens a turn used, from the model's usage
+
+plus running totals of tokens by agent and of handoffs by route. Read them
+with to_prometheus() or to_json(), serve them with serve_metrics(), and
+write them out with dump(), e.g. from atexit.
+"""
+
+import asyncio
+import bisect
+import json
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from agents import Agent, RunContextWrapper, RunHooks, Tool
+from agents.items import ModelResponse
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768, 65536)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8)
+
+# (metric name, sorted (label, value) pairs)
+_Key = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+class Histogram:
+    """Counts of observations at or below each bucket bound, like a Prometheus histogram"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, fraction: float) -> Optional[float]:
+        """Upper bound of the bucket holding the quantile, None without observations"""
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def to_dict(self) -> Dict[str, Any]:
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        buckets["+Inf"] = self.count
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": buckets,
+        }
+
+
+def _labels(labels: Dict[str, str]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _prometheus_labels(labels: Tuple[Tuple[str, str], ...], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class MetricsRegistry:
+    """
+    Named histograms and counters, each split by labels.
+
+    Safe to update from worker threads as well as the event loop.
+    """
+
+    def __init__(self, prefix: str = "disaster_relief_"):
+        self.prefix = prefix
+        self._histograms: Dict[_Key, Histogram] = {}
+        self._counters: Dict[_Key, float] = defaultdict(float)
+        self._help: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name: str, help_text: str):
+        self._help[name] = help_text
+
+    def observe(self, name: str, value: float, buckets: Sequence[float] = SECONDS_BUCKETS, **labels: str):
+        key = (name, _labels(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def increment(self, name: str, amount: float = 1, **labels: str):
+        with self._lock:
+            self._counters[(name, _labels(labels))] += amount
+
+    def histogram(self, name: str, **labels: str) -> Optional[Histogram]:
+        return self._histograms.get((name, _labels(labels)))
+
+    def histograms(self, name: str) -> Dict[Tuple[Tuple[str, str], ...], Histogram]:
+        """Every histogram of a metric, by labels"""
+        with self._lock:
+            return {labels: histogram for (metric, labels), histogram in self._histograms.items() if metric == name}
+
+    def counter(self, name: str, **labels: str) -> float:
+        return self._counters.get((name, _labels(labels)), 0.0)
+
+    def to_json(self) -> Dict[str, Any]:
+        with self._lock:
+            histograms = [
+                {"name": name, "labels": dict(labels), **histogram.to_dict()}
+                for (name, labels), histogram in sorted(self._histograms.items())
+            ]
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self._counters.items())
+            ]
+        return {"histograms": histograms, "counters": counters}
+
+    def to_prometheus(self) -> str:
+        """Metrics in the Prometheus text exposition format"""
+        lines: List[str] = []
+        described = set()
+
+        def header(name: str, kind: str):
+            if name in described:
+                return
+            described.add(name)
+            if name in self._help:
+                lines.append(f"# HELP {self.prefix}{name} {self._help[name]}")
+            lines.append(f"# TYPE {self.prefix}{name} {kind}")
+
+        with self._lock:
+            for (name, labels), histogram in sorted(self._histograms.items()):
+                header(name, "histogram")
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f"{self.prefix}{name}_bucket{_prometheus_labels(labels, ('le', str(bound)))} {cumulative}")
+                lines.append(f"{self.prefix}{name}_bucket{_prometheus_labels(labels, ('le', '+Inf'))} {histogram.count}")
+                lines.append(f"{self.prefix}{name}_sum{_prometheus_labels(labels)} {histogram.sum}")
+                lines.append(f"{self.prefix}{name}_count{_prometheus_labels(labels)} {histogram.count}")
+            for (name, labels), value in sorted(self._counters.items()):
+                header(name, "counter")
+                lines.append(f"{self.prefix}{name}_total{_prometheus_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: str):
+        """Write the metrics as JSON, or Prometheus text for a .prom path"""
+        with open(path, "w") as f:
+            if path.endswith(".prom"):
+                f.write(self.to_prometheus())
+            else:
+                json.dump(self.to_json(), f, indent=2)
+
+
+@dataclass
+class _OpenTurn:
+    start: float
+    handoffs: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    handing_off: bool = False
+    model_started: Optional[float] = None
+    tools_started: Dict[str, List[float]] = field(default_factory=lambda: defaultdict(list))
+
+
+class RunMetrics(RunHooks):
+    """
+    RunHooks recording turn, model and tool timings, handoffs and tokens.
+
+    Turns are tracked per AgentContext, so one RunMetrics can observe many
+    sessions as long as each session runs one turn at a time, as
+    AgentServer ensures.
+
+    Args:
+        registry: Where to record, a new MetricsRegistry by default
+    """
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None):
+        self.registry = registry if registry is not None else MetricsRegistry()
+        self._turns: Dict[int, _OpenTurn] = {}
+        for name, help_text in (
+            ("turn_seconds", "Wall time of a turn, by the agent that produced the final output"),
+            ("model_seconds", "Latency of one model call, by agent"),
+            ("tool_seconds", "Wall time of one function tool call, by tool"),
+            ("turn_handoffs", "Handoffs within one turn"),
+            ("turn_input_tokens", "Input tokens of one turn, summed over its model calls"),
+            ("turn_output_tokens", "Output tokens of one turn, summed over its model calls"),
+            ("input_tokens", "Input tokens, by agent"),
+            ("output_tokens", "Output tokens, by agent"),
+            ("handoffs", "Handoffs, by source and target agent"),
+        ):
+            self.registry.describe(name, help_text)
+
+    def _turn(self, context: RunContextWrapper) -> _OpenTurn:
+        key = id(context.context)
+        turn = self._turns.get(key)
+        if turn is None:
+            turn = self._turns[key] = _OpenTurn(time.perf_counter())
+        return turn
+
+    async def on_agent_start(self, context: RunContextWrapper, agent: Agent) -> None:
+        turn = self._turns.get(id(context.context))
+        if turn is not None and turn.handing_off:
+            turn.handing_off = False
+            return
+        # A new turn, or one that failed without reaching a final output
+        self._turns[id(context.context)] = _OpenTurn(time.perf_counter())
+
+    async def on_agent_end(self, context: RunContextWrapper, agent: Agent, output: Any) -> None:
+        turn = self._turns.pop(id(context.context), None)
+        if turn is None:
+            return
+        self.registry.observe("turn_seconds", time.perf_counter() - turn.start, agent=agent.name)
+        self.registry.observe("turn_handoffs", turn.handoffs, buckets=COUNT_BUCKETS)
+        self.registry.observe("turn_input_tokens", turn.input_tokens, buckets=TOKEN_BUCKETS)
+        self.registry.observe("turn_output_tokens", turn.output_tokens, buckets=TOKEN_BUCKETS)
+
+    async def on_llm_start(self, context: RunContextWrapper, agent: Agent, system_prompt, input_items) -> None:
+        self._turn(context).model_started = time.perf_counter()
+
+    async def on_llm_end(self, context: RunContextWrapper, agent: Agent, response: ModelResponse) -> None:
+        turn = self._turn(context)
+        if turn.model_started is not None:
+            self.registry.observe("model_seconds", time.perf_counter() - turn.model_started, agent=agent.name)
+            turn.model_started = None
+        usage = response.usage
+        turn.input_tokens += usage.input_tokens
+        turn.output_tokens += usage.output_tokens
+        self.registry.increment("input_tokens", usage.input_tokens, agent=agent.name)
+        self.registry.increment("output_tokens", usage.output_tokens, agent=agent.name)
+
+    async def on_tool_start(self, context: RunContextWrapper, agent: Agent, tool: Tool) -> None:
+        self._turn(context).tools_started[tool.name].append(time.perf_counter())
+
+    async def on_tool_end(self, context: RunContextWrapper, agent: Agent, tool: Tool, result: Any) -> None:
+        started = self._turn(context).tools_started[tool.name]
+        if started:
+            self.registry.observe("tool_seconds", time.perf_counter() - started.pop(), tool=tool.name)
+
+    async def on_handoff(self, context: RunContextWrapper, from_agent: Agent, to_agent: Agent) -> None:
+        turn = self._turn(context)
+        turn.handoffs += 1
+        turn.handing_off = True
+        self.registry.increment("handoffs", source=from_agent.name, target=to_agent.name)
+
+
+async def serve_metrics(registry: MetricsRegistry, host: str = "127.0.0.1", port: int = 9464):
+    """
+    Serve the metrics over HTTP until cancelled
+
+    GET /metrics returns Prometheus text and GET /metrics.json returns JSON.
+    """
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            # Skip the request headers
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            path = request_line[1] if len(request_line) > 1 else "/"
+            if path == "/metrics.json":
+                status, content_type, body = "200 OK", "application/json", json.dumps(registry.to_json())
+            elif path in ("/", "/metrics"):
+                status, content_type, body = "200 OK", "text/plain; version=0.0.4", registry.to_prometheus()
+            else:
+                status, content_type, body = "404 Not Found", "text/plain", "not found\n"
+            data = body.encode()
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\nContent-Length: {len(data)}\r\n"
+                f"Connection: close\r\n\r\n".encode()
+                + data
+            )
+            await writer.drain()
+        finally:
+            writer.close()
+
+    metrics_server = await asyncio.start_server(handle, host, port)
+    async with metrics_server:
+        await metrics_server.serve_forever()
+
+
+def test_run_metrics_offline():
+    from agents import RunConfig, Runner
+
+    from agent_graph import triage_agent
+    from context import AgentContext
+    from fake_model import ScriptedModelProvider
+
+    metrics = RunMetrics()
+    run_config = RunConfig(model_provider=ScriptedModelProvider(), tracing_disabled=True)
+    asyncio.run(Runner.run(triage_agent, "My father is not breathing!", context=AgentContext(), run_config=run_config, hooks=metrics))
+
+    registry = metrics.registry
+    assert registry.histogram("turn_seconds", agent="Responder Coordinator").count == 1
+    assert registry.histogram("turn_handoffs").sum == 1
+    assert registry.histogram("tool_seconds", tool="request_first_responder").count == 1
+    assert registry.histogram("turn_input_tokens").sum > 0
+    assert registry.counter("handoffs", source="Triage Agent", target="Responder Coordinator") == 1
+    assert 'disaster_relief_tool_seconds_count{tool="request_first_responder"} 1' in registry.to_prometheus()
@@ -0,0 +1,190 @@
+"""
+Offline load test of the agent graph.
+
+Simulated callers talk to an AgentServer backed by ScriptedModel, so turns
+run through the real agents, handoffs and tools without network access or
+API keys. Each caller opens with one of router.LABELED_UTTERANCES and sends
+follow-ups until it has sent ``turns`` messages. Run with e.g.
+
+    python loadtest.py --callers 200 --turns 3 --latency 0.3 --jitter 0.2
+
+and it reports throughput, p50/p95/p99 turn latency and time spent per tool.
+Model latency is simulated, so the numbers measure the orchestration around
+the model, not the model itself.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from agents import RunConfig, set_tracing_disabled
+
+from agent_graph import HANDOFF_GOVERNOR
+from fake_model import ScriptedModelProvider
+from faq_cache import FAQCache
+from instrumentation import RunMetrics
+from router import LABELED_UTTERANCES, build_router
+from server import AgentServer
+
+FOLLOW_UPS = [
+    "Okay, what should I do now?",
+    "How long until someone gets here?",
+    "Is the road to the hospital open?",
+    "Thank you, they seem a bit better.",
+]
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Nearest-rank percentile, 0.0 for no samples"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+@dataclass
+class LoadTestReport:
+    callers: int
+    turns: int
+    elapsed: float
+    turn_latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+    tool_calls: Dict[str, int] = field(default_factory=dict)
+    tool_seconds: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def throughput(self) -> float:
+        """Turns completed per second"""
+        return len(self.turn_latencies) / self.elapsed if self.elapsed else 0.0
+
+    def summary(self) -> str:
+        lines = [
+            f"{self.callers} callers, {self.turns} turns in {self.elapsed:.2f}s ({self.errors} failed)",
+            f"throughput {self.throughput:.1f} turns/s",
+            "turn latency p50 {:.1f}ms p95 {:.1f}ms p99 {:.1f}ms".format(
+                *(percentile(self.turn_latencies, p) * 1000 for p in (0.5, 0.95, 0.99))
+            ),
+        ]
+        for name in sorted(self.tool_calls, key=self.tool_seconds.get, reverse=True):
+            calls, seconds = self.tool_calls[name], self.tool_seconds[name]
+            lines.append(f"  {name}: {calls} calls, {seconds * 1000:.1f}ms total, {seconds / calls * 1000:.2f}ms avg")
+        return "\n".join(lines)
+
+
+def caller_script(caller: int, turns: int, rng: random.Random) -> List[str]:
+    """The messages one simulated caller sends, in order"""
+    opening, _ = LABELED_UTTERANCES[caller % len(LABELED_UTTERANCES)]
+    return [opening] + [rng.choice(FOLLOW_UPS) for _ in range(turns - 1)]
+
+
+async def run_load_test(
+    callers: int = 50,
+    turns: int = 3,
+    latency: float = 0.0,
+    jitter: float = 0.0,
+    max_concurrency: int = 16,
+    use_router: bool = True,
+    use_cache: bool = True,
+    seed: int = 0,
+) -> LoadTestReport:
+    """
+    Run simulated callers concurrently against one AgentServer
+
+    Args:
+        callers: Number of simultaneous conversations
+        turns: Messages each caller sends
+        latency: Seconds each scripted model response takes
+        jitter: Extra model seconds, uniformly drawn up to this much
+        max_concurrency: Concurrent Runner.run calls in the server
+        use_router: Route clear openings past triage with the fast-path router
+        use_cache: Answer repeated FAQ questions from a FAQCache
+        seed: Seed of the caller scripts and the model jitter
+
+    Returns:
+        LoadTestReport: Latencies, errors and tool timings of the run
+    """
+    metrics = RunMetrics()
+    server = AgentServer(
+        max_concurrency=max_concurrency,
+        run_config=RunConfig(
+            model_provider=ScriptedModelProvider(latency=latency, jitter=jitter, seed=seed), tracing_disabled=True
+        ),
+        router=build_router() if use_router else None,
+        faq_cache=FAQCache() if use_cache else None,
+        hooks=metrics,
+    )
+    rng = random.Random(seed)
+    scripts = [caller_script(caller, turns, rng) for caller in range(callers)]
+    latencies: List[float] = []
+    errors = 0
+
+    async def call(caller: int, messages: List[str]):
+        nonlocal errors
+        for message in messages:
+            start = time.perf_counter()
+            try:
+                await server.handle_message(f"caller-{caller}", message)
+            except Exception:
+                errors += 1
+                return
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(call(caller, messages) for caller, messages in enumerate(scripts)))
+    tools = {dict(labels)["tool"]: histogram for labels, histogram in metrics.registry.histograms("tool_seconds").items()}
+    return LoadTestReport(
+        callers=callers,
+        turns=sum(len(messages) for messages in scripts),
+        elapsed=time.perf_counter() - start,
+        turn_latencies=latencies,
+        errors=errors,
+        tool_calls={name: histogram.count for name, histogram in tools.items()},
+        tool_seconds={name: histogram.sum for name, histogram in tools.items()},
+    )
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Offline load test with a scripted model")
+    parser.add_argument("--callers", type=int, default=50, help="simultaneous simulated callers")
+    parser.add_argument("--turns", type=int, default=3, help="messages per caller")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per model response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random seconds per model response")
+    parser.add_argument("--max-concurrency", type=int, default=16, help="concurrent Runner.run calls")
+    parser.add_argument("--no-router", action="store_true", help="send every opening through triage")
+    parser.add_argument("--no-cache", action="store_true", help="disable the FAQ answer cache")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    # Offline: the server's trace() spans have nowhere to go
+    set_tracing_disabled(True)
+
+    report = asyncio.run(
+        run_load_test(
+            callers=args.callers,
+            turns=args.turns,
+            latency=args.latency,
+            jitter=args.jitter,
+            max_concurrency=args.max_concurrency,
+            use_router=not args.no_router,
+            use_cache=not args.no_cache,
+            seed=args.seed,
+        )
+    )
+    print(report.summary())
+    handoffs = HANDOFF_GOVERNOR.report()
+    if handoffs:
+        print("handoffs:")
+        print("\n".join(f"  {line}" for line in handoffs))
+
+
+def test_load_test_offline():
+    report = asyncio.run(run_load_test(callers=12, turns=2, max_concurrency=4))
+    assert report.errors == 0
+    assert len(report.turn_latencies) == report.turns == 24
+    assert report.tool_calls.get("request_first_responder", 0) > 0
+
+
+if __name__ == "__main__":
+    main()
@@ -1,79 +1,21 @@
 from __future__ import annotations as _annotations
 
+import argparse
 import asyncio
-import random
+import atexit
+import importlib
+import time
 import uuid
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, List, Optional
+
+# The agents SDK and the agent graph are imported once the prompt is up, see startup.py
+from startup import init_telemetry, load_environment, start_telemetry
+
+if TYPE_CHECKING:
+    from agents import Agent, RunItem, RunResultStreaming, TResponseInputItem
+    from context import AgentContext
 
-from pydantic import BaseModel
-
-from dotenv import load_dotenv
-import os
-import agentops
-
-from agents import (
-    Agent,
-    HandoffOutputItem,
-    ItemHelpers,
-    MessageOutputItem,
-    RunContextWrapper,
-    Runner,
-    ToolCallItem,
-    ToolCallOutputItem,
-    TResponseInputItem,
-    function_tool,
-    handoff,
-    trace,
-)
-from agents.extensions.handoff_prompt import RECOMMENDED_PROMPT_PREFIX
-
-# global context
-from context import AgentContext
-
-# import agents
-from agent_defs.triage import triage_agent
-from agent_defs.faq import faq_agent
-from agent_defs.personal_care import personal_care_agent
-from agent_defs.responder_coordinator import responder_coordinator_agent
-
-# Load the environment variables for the script
-load_dotenv()
-
-# Initialize the agentops module
-AGENTOPS_API_KEY = os.getenv("AGENTOPS_API_KEY")
-agentops.init(api_key=AGENTOPS_API_KEY)
-
-# Update agent instructions with handoff guidelines
-faq_agent.instructions = f"""{faq_agent.instructions}
-    # Additional Handoff Guidelines
-    - If user mentions any injuries or medical concerns, transfer to personal_care_agent
-    - If situation seems critical or life-threatening, transfer to responder_coordinator_agent
-    - For complex disaster coordination needs, transfer to triage_agent"""
-
-personal_care_agent.instructions = f"""{personal_care_agent.instructions}
-    # Additional Handoff Guidelines
-    - If situation is life-threatening or requires immediate response, transfer to responder_coordinator_agent
-    - For general disaster information, transfer to faq_agent
-    - For complex coordination needs, transfer to triage_agent"""
-
-responder_coordinator_agent.instructions = f"""{responder_coordinator_agent.instructions}
-    # Additional Handoff Guidelines
-    - When no responders are available, transfer to personal_care_agent for first aid guidance
-    - For non-urgent situations, transfer to faq_agent
-    - For complex coordination or when situation changes, transfer to triage_agent"""
-
-triage_agent.instructions = f"""{triage_agent.instructions}
-    # Detailed Handoff Guidelines
-    1. Life-threatening emergencies: Transfer to responder_coordinator_agent
-    2. Medical needs and injuries: Transfer to personal_care_agent
-    3. General disaster information: Transfer to faq_agent
-    
-    Always assess severity first and prioritize immediate threats to life."""
-
-# init agent handoffs here to avoid circular imports
-faq_agent.handoffs = [personal_care_agent, responder_coordinator_agent, triage_agent]
-personal_care_agent.handoffs = [responder_coordinator_agent, faq_agent, triage_agent]
-responder_coordinator_agent.handoffs = [personal_care_agent, faq_agent, triage_agent]
-triage_agent.handoffs = [responder_coordinator_agent, personal_care_agent, faq_agent]
 
 ### RUN
 
@@ -82,34 +24,200 @@ from colorama import init, Fore, Style
 # Initialize colorama for cross-platform color support
 init()
 
-async def main():
+
+def render_message(agent_name: str, text: str) -> str:
+    return f"{Fore.BLUE}{agent_name}: {Fore.WHITE}{text}{Style.RESET_ALL}"
+
+
+def render_item(new_item: RunItem) -> str:
+    """Format a run item as one colored console line"""
+    from agents import HandoffOutputItem, ItemHelpers, MessageOutputItem, ToolCallItem, ToolCallOutputItem
+
+    agent_name = new_item.agent.name
+    if isinstance(new_item, MessageOutputItem):
+        return render_message(agent_name, ItemHelpers.text_message_output(new_item))
+    elif isinstance(new_item, HandoffOutputItem):
+        return f"{Fore.YELLOW}[SYSTEM] Handed off from {new_item.source_agent.name} to {new_item.target_agent.name}{Style.RESET_ALL}"
+    elif isinstance(new_item, ToolCallItem):
+        return f"{Fore.MAGENTA}[DEBUG] {agent_name}: Calling a tool{Style.RESET_ALL}"
+    elif isinstance(new_item, ToolCallOutputItem):
+        return f"{Fore.CYAN}[TOOL] {agent_name}: {new_item.output}{Style.RESET_ALL}"
+    else:
+        return f"{Fore.RED}[WARNING] {agent_name}: Skipping item: {new_item.__class__.__name__}{Style.RESET_ALL}"
+
+
+@dataclass
+class TurnTiming:
+    """Latency of one streamed turn, in seconds"""
+
+    time_to_first_token: Optional[float]
+    total: float
+
+
+async def stream_turn(
+    current_agent: Agent[AgentContext],
+    input_items: list[TResponseInputItem],
+    context: AgentContext,
+    hooks=None,
+) -> tuple[RunResultStreaming, TurnTiming]:
+    """Run one turn with Runner.run_streamed, printing text deltas and items as they arrive"""
+    from agents import MessageOutputItem, Runner
+    from openai.types.responses import ResponseTextDeltaEvent
+
+    start = time.perf_counter()
+    first_token: Optional[float] = None
+    in_message = False
+
+    result = Runner.run_streamed(current_agent, input_items, context=context, hooks=hooks)
+    async for event in result.stream_events():
+        if event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
+            if first_token is None:
+                first_token = time.perf_counter() - start
+            if not in_message:
+                print(f"{Fore.BLUE}{result.current_agent.name}: {Fore.WHITE}", end="")
+                in_message = True
+            print(event.data.delta, end="", flush=True)
+        elif event.type == "run_item_stream_event":
+            if isinstance(event.item, MessageOutputItem) and in_message:
+                # The text was already printed delta by delta
+                print(Style.RESET_ALL)
+                in_message = False
+            else:
+                print(render_item(event.item))
+
+    return result, TurnTiming(first_token, time.perf_counter() - start)
+
+
+def _load_agent_graph():
+    """Import the agent graph and everything a turn needs"""
+    for module in ("agent_graph", "agent_defs.disaster_info_agg", "instrumentation", "router"):
+        importlib.import_module(module)
+
+
+async def main(
+    stream: bool = False,
+    metrics_port: Optional[int] = None,
+    metrics_file: Optional[str] = None,
+    telemetry: bool = False,
+    telemetry_file: Optional[str] = None,
+):
+    load_environment()
+    prompt = f"{Fore.GREEN}Enter your message: {Style.RESET_ALL}"
+    # The caller can start typing while the agent graph loads
+    first_input = asyncio.ensure_future(asyncio.to_thread(input, prompt))
+    await asyncio.to_thread(_load_agent_graph)
+
+    from agents import Runner, trace
+    from agent_defs.disaster_info_agg import FakeNewsSource
+    from agent_graph import HANDOFF_GOVERNOR, faq_agent, triage_agent
+    from context import AgentContext
+    from faq_cache import FAQCache, is_cacheable
+    from history import HistoryManager
+    from ingestion import NewsIngestor
+    from instrumentation import RunMetrics, serve_metrics
+    from router import build_router
+    from telemetry import use_local_telemetry
+
     current_agent: Agent[AgentContext] = triage_agent
     input_items: list[TResponseInputItem] = []
     context = AgentContext()
+    turn_timings: List[TurnTiming] = []
+    history = HistoryManager()
+    router = build_router()
+    faq_cache = FAQCache()
+    metrics = RunMetrics()
+    HANDOFF_GOVERNOR.registry = metrics.registry
+    if metrics_file:
+        atexit.register(metrics.registry.dump, metrics_file)
+    if telemetry_file:
+        use_local_telemetry(telemetry_file, registry=metrics.registry)
+    elif telemetry:
+        start_telemetry()
 
     conversation_id = uuid.uuid4().hex[:16]
 
-    while True:
-        user_input = input(f"{Fore.GREEN}Enter your message: {Style.RESET_ALL}")
-        with trace("Disaster Relief", group_id=conversation_id):
-            input_items.append({"content": user_input, "role": "user"})
-            result = await Runner.run(current_agent, input_items, context=context)
-
-            for new_item in result.new_items:
-                agent_name = new_item.agent.name
-                if isinstance(new_item, MessageOutputItem):
-                    print(f"{Fore.BLUE}{agent_name}: {Fore.WHITE}{ItemHelpers.text_message_output(new_item)}{Style.RESET_ALL}")
-                elif isinstance(new_item, HandoffOutputItem):
-                    print(f"{Fore.YELLOW}[SYSTEM] Handed off from {new_item.source_agent.name} to {new_item.target_agent.name}{Style.RESET_ALL}")
-                elif isinstance(new_item, ToolCallItem):
-                    print(f"{Fore.MAGENTA}[DEBUG] {agent_name}: Calling a tool{Style.RESET_ALL}")
-                elif isinstance(new_item, ToolCallOutputItem):
-                    print(f"{Fore.CYAN}[TOOL] {agent_name}: {new_item.output}{Style.RESET_ALL}")
+    # News arrives in the background while the caller types
+    ingestor = NewsIngestor([FakeNewsSource()], lambda: [context])
+    ingestor.start()
+    metrics_task = asyncio.create_task(serve_metrics(metrics.registry, port=metrics_port)) if metrics_port else None
+
+    try:
+        while True:
+            if first_input is not None:
+                user_input, first_input = await first_input, None
+            else:
+                user_input = await asyncio.to_thread(input, prompt)
+            with trace("Disaster Relief", group_id=conversation_id):
+                input_items.append({"content": user_input, "role": "user"})
+                decision = None
+                if current_agent is router.triage:
+                    # Skip the triage hop when the message clearly belongs to one specialist
+                    decision = router.route(user_input)
+                    current_agent = decision.agent
+                fingerprint = context.events.fingerprint
+                cacheable = current_agent is faq_agent and is_cacheable(user_input)
+                answer = faq_cache.get(user_input, fingerprint) if cacheable else None
+                if answer is not None:
+                    # Answered from the cache, no model call
+                    print(render_message(current_agent.name, answer))
+                    print(f"{Style.DIM}[METRICS] FAQ cache hit ({faq_cache.stats.hits} hits, {faq_cache.stats.misses} misses){Style.RESET_ALL}")
+                    input_items.append({"content": answer, "role": "assistant"})
+                    continue
+                turn_start = time.perf_counter()
+                if stream:
+                    result, timing = await stream_turn(current_agent, input_items, context, metrics)
+                    turn_timings.append(timing)
+                    first_token = f"{timing.time_to_first_token * 1000:.0f} ms" if timing.time_to_first_token is not None else "n/a"
+                    print(f"{Style.DIM}[METRICS] first token {first_token}, turn {timing.total * 1000:.0f} ms{Style.RESET_ALL}")
                 else:
-                    print(f"{Fore.RED}[WARNING] {agent_name}: Skipping item: {new_item.__class__.__name__}{Style.RESET_ALL}")
-            input_items = result.to_input_list()
-            current_agent = result.last_agent
+                    result = await Runner.run(current_agent, input_items, context=context, hooks=metrics)
+
+                    for new_item in result.new_items:
+                        print(render_item(new_item))
+                if cacheable and result.last_agent is faq_agent and isinstance(result.final_output, str):
+                    faq_cache.put(user_input, fingerprint, result.final_output)
+                if decision is not None:
+                    router.record_turn(decision, time.perf_counter() - turn_start)
+                    if decision.fast_path:
+                        print(
+                            f"{Style.DIM}[METRICS] routed to {decision.agent.name} without triage "
+                            f"(hit rate {router.stats.hit_rate:.0%}, saved ~{router.stats.latency_saved:.1f} s){Style.RESET_ALL}"
+                        )
+                input_items, report = history.compact(result.to_input_list())
+                if report.tokens_saved:
+                    print(
+                        f"{Style.DIM}[METRICS] history {report.tokens_before} -> {report.tokens_after} tokens "
+                        f"(saved {report.tokens_saved}){Style.RESET_ALL}"
+                    )
+                current_agent = result.last_agent
+
+    finally:
+        await ingestor.stop()
+        if metrics_task is not None:
+            metrics_task.cancel()
+            await asyncio.gather(metrics_task, return_exceptions=True)
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Chat with the disaster relief agents.")
+    parser.add_argument("--stream", action="store_true", help="stream responses as they are generated")
+    parser.add_argument("--metrics-port", type=int, help="serve turn metrics over HTTP on this port")
+    parser.add_argument("--metrics-file", default="metrics.json", help="write turn metrics here on exit (.prom for Prometheus text)")
+    parser.add_argument(
+        "--eager-telemetry", action="store_true", help="initialize agentops before the prompt instead of in the background"
+    )
+    parser.add_argument("--telemetry-file", help="write traces to this NDJSON file instead of agentops and OpenAI")
+    args = parser.parse_args()
+
+    if args.eager_telemetry and not args.telemetry_file:
+        load_environment()
+        init_telemetry()
+    asyncio.run(
+        main(
+            stream=args.stream,
+            metrics_port=args.metrics_port,
+            metrics_file=args.metrics_file,
+            telemetry=not args.eager_telemetry,
+            telemetry_file=args.telemetry_file,
+        )
+    )
@@ -0,0 +1,135 @@
+"""
+BM25 retrieval over the disaster timeline.
+
+general_info_lookup_tool used to return the whole timeline, which grows with
+every news update. NewsIndex indexes each event of the timeline and answers a
+question with the few events that match it best plus the latest updates.
+"""
+
+import itertools
+import math
+import re
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from events import EventStore
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from has have how i in is it its "
+    "me my of on or the their there this to was we what when where which will with you".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN_RE.findall(text.lower()) if token not in _STOPWORDS]
+
+
+class NewsIndex:
+    """
+    Incremental BM25 index over timeline entries.
+
+    Entries can be added and removed one at a time; term statistics are kept
+    up to date so no rebuild is needed as news arrives. sync() mirrors an
+    EventStore, indexing new events and dropping evicted ones.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.clear()
+
+    def clear(self):
+        self._entries: Dict[int, str] = {}
+        self._lengths: Dict[int, int] = {}
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._total_length = 0
+        self._next_id = 0
+        # Event sequence number -> entry id, oldest first, as of the last sync
+        self._synced: "OrderedDict[int, int]" = OrderedDict()
+        self._synced_seq = 0
+        self._synced_version = -1
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, entry: str) -> int:
+        entry_id = self._next_id
+        self._next_id += 1
+        terms = Counter(tokenize(entry))
+        self._entries[entry_id] = entry
+        self._lengths[entry_id] = sum(terms.values())
+        self._total_length += self._lengths[entry_id]
+        for term, count in terms.items():
+            self._postings.setdefault(term, {})[entry_id] = count
+        return entry_id
+
+    def remove(self, entry_id: int):
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return
+        self._total_length -= self._lengths.pop(entry_id)
+        for term in set(tokenize(entry)):
+            postings = self._postings[term]
+            del postings[entry_id]
+            if not postings:
+                del self._postings[term]
+
+    def sync(self, store: EventStore):
+        """Index events added to the store since the last sync and drop evicted ones"""
+        if store.version == self._synced_version:
+            return
+
+        # Stores only ever evict their oldest events
+        oldest_seq = store.oldest_seq
+        while self._synced and next(iter(self._synced)) < oldest_seq:
+            _, entry_id = self._synced.popitem(last=False)
+            self.remove(entry_id)
+
+        for seq, event in store.since(self._synced_seq):
+            self._synced[seq] = self.add(event.render())
+            self._synced_seq = seq
+        self._synced_version = store.version
+
+    def search(self, query: str, k: int = 3) -> List[Tuple[int, float]]:
+        """Return up to k (entry_id, score) pairs, best first"""
+        n_entries = len(self._entries)
+        if not n_entries:
+            return []
+        avg_length = self._total_length / n_entries
+
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_entries - len(postings) + 0.5) / (len(postings) + 0.5))
+            for entry_id, count in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[entry_id] / avg_length)
+                scores[entry_id] = scores.get(entry_id, 0.0) + idf * count * (self.k1 + 1) / (count + norm)
+
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+    def latest(self, n: int) -> List[int]:
+        return list(itertools.islice(reversed(self._entries), n))[::-1]
+
+    def lookup(self, question: str, k: int = 3, latest: int = 2) -> str:
+        """
+        Render the entries most relevant to a question plus the latest updates
+
+        Args:
+            question: The caller's question
+            k: Number of best-matching entries
+            latest: Number of most recent entries always included
+
+        Returns:
+            str: The selected entries as a markdown list, oldest first
+        """
+        entry_ids = {entry_id for entry_id, _ in self.search(question, k)}
+        entry_ids.update(self.latest(latest))
+        if not entry_ids:
+            return "No disaster information is available yet."
+        return "\n".join(f"- {self._entries[entry_id]}" for entry_id in sorted(entry_ids))
+
+    def get(self, entry_id: int) -> Optional[str]:
+        return self._entries.get(entry_id)
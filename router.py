@@ -0,0 +1,290 @@
+"""
+Deterministic fast path in front of the triage agent.
+
+triage_agent only hands off, so a message that clearly belongs to one
+specialist costs a full model call before any useful work happens.
+FastPathRouter classifies the opening message locally and starts the run at
+the target agent when it is confident, falling back to triage otherwise:
+
+    decision = router.route(message)
+    result = await Runner.run(decision.agent, input_items, context=context)
+    router.record_turn(decision, elapsed)
+
+Run `python router.py` to evaluate the router on a labeled utterance set.
+"""
+
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Sequence, Tuple
+
+from agents import Agent
+
+from context import AgentContext
+from agent_defs.responder_coordinator import CRITICAL_KEYWORDS, URGENT_KEYWORDS
+
+COORDINATOR = "responder_coordinator"
+PERSONAL_CARE = "personal_care"
+FAQ = "faq"
+TRIAGE = "triage"
+
+# Terms hinting at each specialist, with weights. Critical keywords always win.
+MEDICAL_KEYWORDS: Dict[str, float] = {
+    **{keyword: 1.0 for keyword in URGENT_KEYWORDS},
+    "injured": 1.0,
+    "hurt": 1.0,
+    "wound": 1.0,
+    "cut": 0.5,
+    "burn": 1.0,
+    "burned": 1.0,
+    "sprained": 1.0,
+    "fracture": 1.0,
+    "pain": 0.75,
+    "bleeding": 1.0,
+    "dizzy": 0.75,
+    "fever": 0.75,
+    "cough": 0.5,
+    "coughing": 0.5,
+    "first aid": 1.0,
+    "bandage": 1.0,
+    "medication": 0.75,
+    "asthma": 1.0,
+    "allergic": 1.0,
+    "pregnant": 0.75,
+    "ash in my eyes": 1.0,
+}
+FAQ_KEYWORDS: Dict[str, float] = {
+    "flight": 1.0,
+    "flights": 1.0,
+    "airport": 1.0,
+    "airline": 1.0,
+    "airlines": 1.0,
+    "cancelled": 0.75,
+    "canceled": 0.75,
+    "refund": 1.0,
+    "rebook": 1.0,
+    "rebooking": 1.0,
+    "evacuation": 1.0,
+    "evacuate": 1.0,
+    "shelter": 0.75,
+    "news": 0.75,
+    "update": 0.5,
+    "latest": 0.5,
+    "ash cloud": 1.0,
+    "eruption": 0.75,
+    "volcano": 0.75,
+    "airspace": 1.0,
+    "reopen": 1.0,
+    "open again": 1.0,
+    "what is happening": 1.0,
+}
+
+
+def _compile(terms: Sequence[str]) -> re.Pattern:
+    alternation = "|".join(re.escape(term) for term in sorted(terms, key=len, reverse=True))
+    return re.compile(rf"\b(?:{alternation})\b")
+
+
+@dataclass
+class RouteDecision:
+    label: str
+    agent: Agent[AgentContext]
+    confidence: float
+    matched: List[str] = field(default_factory=list)
+
+    @property
+    def fast_path(self) -> bool:
+        return self.label != TRIAGE
+
+
+@dataclass
+class RouterStats:
+    """Fast-path hit rate and the latency it saves"""
+
+    decisions: int = 0
+    hits: int = 0
+    by_label: Dict[str, int] = field(default_factory=dict)
+    fast_path_seconds: float = 0.0
+    fast_path_turns: int = 0
+    triage_seconds: float = 0.0
+    triage_turns: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.decisions if self.decisions else 0.0
+
+    @property
+    def latency_saved(self) -> float:
+        """Seconds saved: fast-path turns times the gap between average triage and fast-path turns"""
+        if not self.fast_path_turns or not self.triage_turns:
+            return 0.0
+        gap = self.triage_seconds / self.triage_turns - self.fast_path_seconds / self.fast_path_turns
+        return max(gap, 0.0) * self.fast_path_turns
+
+
+class FastPathRouter:
+    """
+    Routes opening messages to a specialist without an LLM hop.
+
+    Args:
+        triage: Fallback agent for messages the router is unsure about
+        agents: Specialist agents keyed by COORDINATOR, PERSONAL_CARE and FAQ
+        threshold: Confidence needed to skip triage
+    """
+
+    def __init__(self, triage: Agent[AgentContext], agents: Dict[str, Agent[AgentContext]], threshold: float = 0.75):
+        self.triage = triage
+        self.agents = agents
+        self.threshold = threshold
+        self.stats = RouterStats()
+        self._critical_re = _compile(CRITICAL_KEYWORDS)
+        self._vocabularies: List[Tuple[str, Dict[str, float], re.Pattern]] = [
+            (PERSONAL_CARE, MEDICAL_KEYWORDS, _compile(MEDICAL_KEYWORDS)),
+            (FAQ, FAQ_KEYWORDS, _compile(FAQ_KEYWORDS)),
+        ]
+
+    def classify(self, message: str) -> Tuple[str, float, List[str]]:
+        """
+        Score a message against the vocabularies
+
+        Returns:
+            Tuple[str, float, List[str]]: Label, confidence in [0, 1] and matched terms
+        """
+        text = message.lower()
+        critical = self._critical_re.findall(text)
+        if critical:
+            return COORDINATOR, 1.0, critical
+
+        scores: Dict[str, float] = {}
+        matches: Dict[str, List[str]] = {}
+        for label, weights, pattern in self._vocabularies:
+            found = pattern.findall(text)
+            if found:
+                scores[label] = sum(weights[term] for term in found)
+                matches[label] = found
+        if not scores:
+            return TRIAGE, 0.0, []
+
+        label = max(scores, key=scores.get)
+        # Messages for several specialists are left to triage; weak evidence lowers confidence
+        confidence = min(scores[label], 1.0) if len(scores) == 1 else 0.0
+        return label, confidence, matches[label]
+
+    def route(self, message: str) -> RouteDecision:
+        label, confidence, matched = self.classify(message)
+        if label == TRIAGE or confidence < self.threshold:
+            decision = RouteDecision(TRIAGE, self.triage, confidence, matched)
+        else:
+            decision = RouteDecision(label, self.agents[label], confidence, matched)
+
+        self.stats.decisions += 1
+        self.stats.hits += decision.fast_path
+        self.stats.by_label[decision.label] = self.stats.by_label.get(decision.label, 0) + 1
+        return decision
+
+    def record_turn(self, decision: RouteDecision, elapsed: float):
+        """Record the latency of a turn that started at the routed agent"""
+        if decision.fast_path:
+            self.stats.fast_path_seconds += elapsed
+            self.stats.fast_path_turns += 1
+        else:
+            self.stats.triage_seconds += elapsed
+            self.stats.triage_turns += 1
+
+
+# (utterance, expected label), where TRIAGE means the router should defer
+LABELED_UTTERANCES: List[Tuple[str, str]] = [
+    ("My husband is unconscious and won't wake up", COORDINATOR),
+    ("He's bleeding heavily from his leg", COORDINATOR),
+    ("My father is not breathing!", COORDINATOR),
+    ("I think my neighbour is having a heart attack", COORDINATOR),
+    ("She can't move one side of her face, could it be a stroke?", COORDINATOR),
+    ("I think my arm is broken", PERSONAL_CARE),
+    ("I have a bad cut on my hand, how do I bandage it?", PERSONAL_CARE),
+    ("My son got a burn from the hot ash", PERSONAL_CARE),
+    ("I'm feeling dizzy and coughing a lot", PERSONAL_CARE),
+    ("What first aid should I give for a sprained ankle?", PERSONAL_CARE),
+    ("I got ash in my eyes, what do I do?", PERSONAL_CARE),
+    ("My daughter has asthma and is wheezing", PERSONAL_CARE),
+    ("Are flights cancelled today?", FAQ),
+    ("When will the airport reopen?", FAQ),
+    ("Can I get a refund from my airline?", FAQ),
+    ("Where is the ash cloud heading?", FAQ),
+    ("Is there an evacuation order for my town?", FAQ),
+    ("What is happening with the volcano?", FAQ),
+    ("Any news on the eruption?", FAQ),
+    ("Hello?", TRIAGE),
+    ("I need help", TRIAGE),
+    ("My flight was cancelled and I hurt my back at the airport", TRIAGE),
+    ("Please help us, we are stuck", TRIAGE),
+    ("Can you tell me something?", TRIAGE),
+]
+
+
+@dataclass
+class RouterEvaluation:
+    total: int
+    fast_path: int
+    correct_fast_path: int
+    misrouted: List[Tuple[str, str, str]]
+    classify_us: float
+
+    @property
+    def coverage(self) -> float:
+        """Share of utterances that skipped triage"""
+        return self.fast_path / self.total if self.total else 0.0
+
+    @property
+    def precision(self) -> float:
+        """Share of fast-path decisions that picked the right specialist"""
+        return self.correct_fast_path / self.fast_path if self.fast_path else 1.0
+
+
+def evaluate(router: FastPathRouter, utterances: Sequence[Tuple[str, str]] = LABELED_UTTERANCES) -> RouterEvaluation:
+    """
+    Run the router over labeled utterances
+
+    A fast-path decision is correct when it picks the expected specialist.
+    Deferring to triage is never wrong, only slower, so utterances labeled
+    TRIAGE count as misrouted only when the router skipped triage.
+    """
+    fast_path = correct = 0
+    misrouted = []
+    start = time.perf_counter()
+    decisions = [router.route(utterance) for utterance, _ in utterances]
+    elapsed = time.perf_counter() - start
+
+    for (utterance, expected), decision in zip(utterances, decisions):
+        if not decision.fast_path:
+            continue
+        fast_path += 1
+        if decision.label == expected:
+            correct += 1
+        else:
+            misrouted.append((utterance, expected, decision.label))
+    return RouterEvaluation(len(utterances), fast_path, correct, misrouted, elapsed / max(len(utterances), 1) * 1e6)
+
+
+def build_router(threshold: float = 0.75) -> FastPathRouter:
+    """A router over the wired agent graph"""
+    from agent_graph import faq_agent, personal_care_agent, responder_coordinator_agent, triage_agent
+
+    agents = {COORDINATOR: responder_coordinator_agent, PERSONAL_CARE: personal_care_agent, FAQ: faq_agent}
+    return FastPathRouter(triage_agent, agents, threshold)
+
+
+def test_router_evaluation():
+    report = evaluate(build_router())
+    assert report.precision == 1.0, report.misrouted
+    assert report.coverage >= 0.6
+
+
+if __name__ == "__main__":
+    for threshold in (0.5, 0.75, 0.9):
+        report = evaluate(build_router(threshold))
+        print(
+            f"threshold {threshold:.2f}: coverage {report.coverage:.0%}  precision {report.precision:.0%}  "
+            f"{report.classify_us:.1f} us/message"
+        )
+        for utterance, expected, label in report.misrouted:
+            print(f"  misrouted {utterance!r}: expected {expected}, got {label}")
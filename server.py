@@ -0,0 +1,368 @@
+"""
+Multi-session server mode: one process serving many concurrent callers.
+
+Run with `python server.py` to read `<conversation_id>: <message>` lines from
+stdin, or `python server.py --port 8765` to accept JSON lines over TCP:
+
+    {"conversation_id": "abc", "message": "My leg is broken"}
+"""
+
+from __future__ import annotations as _annotations
+
+import argparse
+import asyncio
+import atexit
+import json
+import sys
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from agents import Agent, RunConfig, RunHooks, Runner, TResponseInputItem, trace
+
+# global context
+from context import AgentContext
+from history import HistoryManager
+from ingestion import DirectoryFeedSource, FeedSource, NewsIngestor
+from router import FastPathRouter, build_router
+from shared_state import SQLiteStateStore, use_shared_state
+from faq_cache import FAQCache, is_cacheable
+from instrumentation import RunMetrics, serve_metrics
+
+# import the wired agent graph
+from agent_graph import HANDOFF_GOVERNOR, faq_agent, triage_agent
+from agent_defs.disaster_info_agg import FakeNewsSource
+from main import render_item, render_message
+from startup import load_environment, start_telemetry
+from telemetry import use_local_telemetry
+
+
+@dataclass
+class Session:
+    """Conversation state that main.main() keeps in local variables"""
+
+    conversation_id: str
+    current_agent: Agent[AgentContext]
+    input_items: List[TResponseInputItem] = field(default_factory=list)
+    context: AgentContext = field(default_factory=AgentContext)
+    last_active: float = field(default_factory=time.monotonic)
+    # Turns of one conversation must not interleave
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+class SessionRegistry:
+    """
+    Live sessions keyed by conversation ID.
+
+    Sessions idle for longer than ``idle_timeout`` are dropped, checked at most
+    every ``expire_interval`` seconds when a session is looked up or the
+    sessions are iterated, e.g. by the news ingestor publishing to them.
+    """
+
+    def __init__(
+        self,
+        starting_agent: Agent[AgentContext],
+        idle_timeout: float = 3600.0,
+        context_factory: Callable[[], AgentContext] = AgentContext,
+        expire_interval: float = 60.0,
+    ):
+        self.starting_agent = starting_agent
+        self.idle_timeout = idle_timeout
+        self.context_factory = context_factory
+        self.expire_interval = expire_interval
+        self._sessions: Dict[str, Session] = {}
+        self._next_expiry = time.monotonic() + expire_interval
+
+    def _maybe_expire(self):
+        now = time.monotonic()
+        if now >= self._next_expiry:
+            self._next_expiry = now + self.expire_interval
+            self.expire_idle()
+
+    def get_or_create(self, conversation_id: str) -> Session:
+        self._maybe_expire()
+        session = self._sessions.get(conversation_id)
+        if session is None:
+            session = Session(conversation_id, self.starting_agent, context=self.context_factory())
+            self._sessions[conversation_id] = session
+        session.last_active = time.monotonic()
+        return session
+
+    def get(self, conversation_id: str) -> Optional[Session]:
+        return self._sessions.get(conversation_id)
+
+    def close(self, conversation_id: str):
+        session = self._sessions.pop(conversation_id, None)
+        if session is not None:
+            session.context.close()
+
+    def expire_idle(self) -> int:
+        """Drop sessions idle for longer than idle_timeout, returning how many"""
+        cutoff = time.monotonic() - self.idle_timeout
+        expired = [
+            conversation_id
+            for conversation_id, session in self._sessions.items()
+            if session.last_active < cutoff and not session.lock.locked()
+        ]
+        for conversation_id in expired:
+            # Responders the caller still holds go back to the pool
+            self.close(conversation_id)
+        return len(expired)
+
+    def __iter__(self):
+        self._maybe_expire()
+        return iter(list(self._sessions.values()))
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+class AgentServer:
+    """
+    Runs agent turns for many sessions concurrently.
+
+    At most ``max_concurrency`` Runner.run calls are in flight at once; turns
+    of the same conversation are serialized. Pass a ``run_config`` with a stub
+    model to run without network access. Each session's history is compacted
+    between turns by ``history``. With an ``ingestor``, new sessions start
+    from the news it has published so far and receive its later batches.
+    Turns that would start at the router's triage agent are routed straight
+    to a specialist when the ``router`` is confident. Questions to faq_agent
+    are answered from ``faq_cache`` when another caller asked them since the
+    timeline last changed. ``hooks`` observe every agent run. Sessions idle
+    for ``idle_timeout`` seconds are dropped.
+    """
+
+    def __init__(
+        self,
+        starting_agent: Agent[AgentContext] = triage_agent,
+        max_concurrency: int = 16,
+        run_config: Optional[RunConfig] = None,
+        history: Optional[HistoryManager] = None,
+        ingestor: Optional[NewsIngestor] = None,
+        router: Optional[FastPathRouter] = None,
+        faq_cache: Optional[FAQCache] = None,
+        hooks: Optional[RunHooks] = None,
+        idle_timeout: float = 3600.0,
+    ):
+        self.ingestor = ingestor
+        self.router = router
+        self.faq_cache = faq_cache
+        context_factory = (lambda: ingestor.seed(AgentContext())) if ingestor is not None else AgentContext
+        self.registry = SessionRegistry(starting_agent, idle_timeout=idle_timeout, context_factory=context_factory)
+        self.max_concurrency = max_concurrency
+        self.run_config = run_config
+        self.hooks = hooks
+        self.history = history if history is not None else HistoryManager()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def handle_message(self, conversation_id: str, message: str) -> List[str]:
+        """Run one turn for a conversation and return its rendered output lines"""
+        session = self.registry.get_or_create(conversation_id)
+        async with session.lock:
+            session.input_items.append({"content": message, "role": "user"})
+            decision = None
+            if self.router is not None and session.current_agent is self.router.triage:
+                decision = self.router.route(message)
+                session.current_agent = decision.agent
+            fingerprint = session.context.events.fingerprint
+            cacheable = self.faq_cache is not None and session.current_agent is faq_agent and is_cacheable(message)
+            answer = self.faq_cache.get(message, fingerprint) if cacheable else None
+            if answer is not None:
+                session.input_items.append({"content": answer, "role": "assistant"})
+                return [render_message(session.current_agent.name, answer)]
+            turn_start = time.perf_counter()
+            async with self._semaphore:
+                with trace("Disaster Relief", group_id=conversation_id):
+                    result = await Runner.run(
+                        session.current_agent,
+                        session.input_items,
+                        context=session.context,
+                        run_config=self.run_config,
+                        hooks=self.hooks,
+                    )
+            if cacheable and result.last_agent is faq_agent and isinstance(result.final_output, str):
+                self.faq_cache.put(message, fingerprint, result.final_output)
+            if decision is not None:
+                self.router.record_turn(decision, time.perf_counter() - turn_start)
+            session.input_items, _ = self.history.compact(result.to_input_list())
+            session.current_agent = result.last_agent
+        return [render_item(new_item) for new_item in result.new_items]
+
+
+async def serve_stdin(server: AgentServer):
+    """Read `<conversation_id>: <message>` lines from stdin and serve them concurrently"""
+    loop = asyncio.get_running_loop()
+    tasks = set()
+
+    async def handle(conversation_id: str, message: str):
+        for line in await server.handle_message(conversation_id, message):
+            print(f"[{conversation_id}] {line}", flush=True)
+
+    while True:
+        # readline blocks, so it runs off the event loop
+        line = await loop.run_in_executor(None, sys.stdin.readline)
+        if not line:
+            break
+        conversation_id, sep, message = line.strip().partition(":")
+        if not sep or not message.strip():
+            print("Expected `<conversation_id>: <message>`", file=sys.stderr)
+            continue
+        task = asyncio.create_task(handle(conversation_id.strip(), message.strip()))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    if tasks:
+        await asyncio.gather(*tasks)
+
+
+async def serve_socket(server: AgentServer, host: str = "127.0.0.1", port: int = 8765):
+    """
+    Accept JSON-line messages over TCP
+
+    Each request line is {"conversation_id": ..., "message": ...}; the ID is
+    optional and defaults to one per connection. Each reply line is
+    {"conversation_id": ..., "output": [...]}, written as turns complete.
+    """
+
+    async def handle_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        default_id = uuid.uuid4().hex[:16]
+        tasks = set()
+
+        async def handle(conversation_id: str, message: str):
+            try:
+                output = await server.handle_message(conversation_id, message)
+                reply = {"conversation_id": conversation_id, "output": output}
+            except Exception as e:
+                reply = {"conversation_id": conversation_id, "error": str(e)}
+            writer.write((json.dumps(reply) + "\n").encode())
+            await writer.drain()
+
+        try:
+            while line := await reader.readline():
+                try:
+                    request = json.loads(line)
+                    message = request["message"]
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    writer.write(b'{"error": "expected {\\"conversation_id\\": ..., \\"message\\": ...}"}\n')
+                    continue
+                task = asyncio.create_task(handle(str(request.get("conversation_id", default_id)), message))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            writer.close()
+
+    tcp_server = await asyncio.start_server(handle_connection, host, port)
+    async with tcp_server:
+        print(f"Serving on {host}:{port}", flush=True)
+        await tcp_server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve many disaster relief conversations from one process.")
+    parser.add_argument("--port", type=int, help="serve JSON lines over TCP instead of stdin")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--max-concurrency", type=int, default=16, help="concurrent Runner.run calls")
+    parser.add_argument("--news-dir", help="ingest news from *.md files in this directory instead of the fake feed")
+    parser.add_argument("--news-interval", type=float, default=15.0, help="seconds between news polls")
+    parser.add_argument(
+        "--state-file", help="share responders and news with other workers through this SQLite file"
+    )
+    parser.add_argument("--idle-timeout", type=float, default=3600.0, help="seconds before an idle session is dropped")
+    parser.add_argument("--metrics-port", type=int, help="serve turn metrics over HTTP on this port")
+    parser.add_argument("--metrics-file", default="metrics.json", help="write turn metrics here on exit (.prom for Prometheus text)")
+    parser.add_argument("--telemetry-file", help="write traces to this NDJSON file instead of agentops and OpenAI")
+    args = parser.parse_args()
+
+    # Whichever exporter is used, turns need the API key and config from .env
+    load_environment()
+    if args.state_file:
+        use_shared_state(SQLiteStateStore(args.state_file))
+    metrics = RunMetrics()
+    HANDOFF_GOVERNOR.registry = metrics.registry
+    atexit.register(metrics.registry.dump, args.metrics_file)
+    if args.telemetry_file:
+        use_local_telemetry(args.telemetry_file, registry=metrics.registry)
+    else:
+        # agentops.init() talks to its backend, callers need not wait for it
+        start_telemetry()
+
+    async def run():
+        sources: List[FeedSource] = [DirectoryFeedSource(args.news_dir) if args.news_dir else FakeNewsSource()]
+        server: Optional[AgentServer] = None
+        ingestor = NewsIngestor(
+            sources,
+            lambda: [session.context for session in server.registry],
+            poll_interval=args.news_interval,
+        )
+        server = AgentServer(
+            max_concurrency=args.max_concurrency,
+            ingestor=ingestor,
+            router=build_router(),
+            faq_cache=FAQCache(),
+            hooks=metrics,
+            idle_timeout=args.idle_timeout,
+        )
+        metrics_task = (
+            asyncio.create_task(serve_metrics(metrics.registry, args.host, args.metrics_port))
+            if args.metrics_port
+            else None
+        )
+        try:
+            async with ingestor:
+                if args.port:
+                    await serve_socket(server, args.host, args.port)
+                else:
+                    await serve_stdin(server)
+        finally:
+            if metrics_task is not None:
+                metrics_task.cancel()
+                await asyncio.gather(metrics_task, return_exceptions=True)
+
+    asyncio.run(run())
+
+
+def test_idle_sessions_expire():
+    """An idle session is dropped and no longer receives news"""
+    from events import DisasterEvent
+
+    registry = SessionRegistry(triage_agent, idle_timeout=0.05, expire_interval=0.0)
+    ingestor = NewsIngestor([], lambda: [session.context for session in registry])
+    idle = registry.get_or_create("idle")
+    before = len(idle.context.events)
+    ingestor.publish([DisasterEvent("08:00 AM", "Morning", "Shelter Opens", "Body.")])
+    assert len(idle.context.events) == before + 1
+
+    time.sleep(0.1)
+    active = registry.get_or_create("active")
+    assert registry.get("idle") is None and len(registry) == 1
+    ingestor.publish([DisasterEvent("09:00 AM", "Morning", "Bridge Closed", "Body.")])
+    assert len(idle.context.events) == before + 1
+    assert len(active.context.events) == before + 1
+
+
+def test_expired_session_releases_responders():
+    from agent_defs.responder_pool import ResponderPool
+
+    pool = ResponderPool({"paramedic": 2})
+
+    def context_factory() -> AgentContext:
+        context = AgentContext()
+        context._responder_pool = pool
+        return context
+
+    registry = SessionRegistry(triage_agent, idle_timeout=0.05, context_factory=context_factory, expire_interval=0.0)
+    session = registry.get_or_create("holding")
+    assert pool.try_reserve(session.context.caller_id, ["paramedic"])
+    assert pool.available("paramedic") == 1
+
+    time.sleep(0.1)
+    assert registry.expire_idle() == 1
+    assert pool.available("paramedic") == 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,380 @@
+"""
+State shared by every worker process serving callers.
+
+AgentContext used to hold the responder inventory and the disaster timeline
+in process memory, so several worker processes would each dispatch from
+their own responders and see their own news. A StateStore keeps those parts
+in one place instead:
+
+- SQLiteStateStore: a WAL-mode SQLite file, for workers on one machine
+- LocalStateStore: in-process, standing in for a networked key-value store
+
+Values are JSON documents with a version number that every write bumps.
+CachedState re-reads a value only when its version changed, and
+transaction() is an atomic read-modify-write. Append-only logs, such as
+the timeline, are kept as separate entries instead: append() writes only
+the new batch and read_log() returns only what follows a sequence number,
+so neither costs more as the log grows. Call use_shared_state() at
+startup, before any AgentContext is created:
+
+    use_shared_state(SQLiteStateStore("disaster_state.db"))
+"""
+
+import json
+import sqlite3
+import itertools
+import threading
+from abc import ABC, abstractmethod
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from typing import Any, ContextManager, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+from agent_defs.responder_pool import ResponderPool, set_shared_responder_pool
+from events import DisasterEvent
+
+
+class StateStore(ABC):
+    """Versioned JSON documents by key"""
+
+    @abstractmethod
+    def get(self, key: str) -> Tuple[int, Optional[Any]]:
+        """Return (version, value), with version 0 and None for a missing key"""
+
+    @abstractmethod
+    def version(self, key: str) -> int:
+        """Return the version of a document, 0 for a missing key"""
+
+    @abstractmethod
+    def transaction(self, key: str) -> ContextManager[Dict]:
+        """
+        Atomically update a document, as a context manager
+
+        Yields the current document, {} if missing, to be changed in place.
+        It is written back on exit, with a new version if it changed.
+        """
+
+    @abstractmethod
+    def append(self, log: str, entries: List[Tuple[str, Any]], keep: Optional[int] = None) -> int:
+        """
+        Atomically add entries to a log, numbering them in order
+
+        Args:
+            log: Name of the log
+            entries: (key, value) pairs; entries whose key is already in the log are skipped
+            keep: Newest entries kept, older ones are dropped, or None to keep all
+
+        Returns:
+            int: Number of entries added
+        """
+
+    @abstractmethod
+    def read_log(self, log: str, after: int = 0) -> List[Tuple[int, Any]]:
+        """Return the (sequence number, value) entries of a log numbered above after, oldest first"""
+
+
+class LocalStateStore(StateStore):
+    """
+    In-process StateStore.
+
+    Documents are kept serialized, as a networked store would return them,
+    so callers never share mutable objects.
+    """
+
+    def __init__(self):
+        self._documents: Dict[str, Tuple[int, str]] = {}
+        # Per log: the next sequence number, and key -> (seq, serialized value) in order
+        self._logs: Dict[str, Tuple[int, "OrderedDict[str, Tuple[int, str]]"]] = {}
+        self._lock = threading.RLock()
+
+    def get(self, key: str) -> Tuple[int, Optional[Any]]:
+        with self._lock:
+            version, data = self._documents.get(key, (0, None))
+        return version, json.loads(data) if data is not None else None
+
+    def version(self, key: str) -> int:
+        with self._lock:
+            return self._documents.get(key, (0, None))[0]
+
+    @contextmanager
+    def transaction(self, key: str) -> Iterator[Dict]:
+        with self._lock:
+            version, data = self._documents.get(key, (0, None))
+            document = json.loads(data) if data is not None else {}
+            yield document
+            new_data = json.dumps(document)
+            if new_data != data:
+                self._documents[key] = (version + 1, new_data)
+
+    def append(self, log: str, entries: List[Tuple[str, Any]], keep: Optional[int] = None) -> int:
+        with self._lock:
+            next_seq, stored = self._logs.get(log, (1, OrderedDict()))
+            added = 0
+            for key, value in entries:
+                if key in stored:
+                    continue
+                stored[key] = (next_seq, json.dumps(value))
+                next_seq += 1
+                added += 1
+            while keep is not None and len(stored) > keep:
+                stored.popitem(last=False)
+            self._logs[log] = (next_seq, stored)
+        return added
+
+    def read_log(self, log: str, after: int = 0) -> List[Tuple[int, Any]]:
+        with self._lock:
+            _, stored = self._logs.get(log, (1, OrderedDict()))
+            # Newest last, so walk back only over the entries above after
+            newer = list(itertools.takewhile(lambda entry: entry[0] > after, reversed(stored.values())))
+        return [(seq, json.loads(data)) for seq, data in reversed(newer)]
+
+
+class SQLiteStateStore(StateStore):
+    """
+    StateStore in an SQLite file shared by worker processes.
+
+    Transactions take SQLite's write lock up front (BEGIN IMMEDIATE), so
+    read-modify-write cycles from different processes never interleave.
+    """
+
+    def __init__(self, path: str = "disaster_state.db", timeout: float = 30.0):
+        self.path = path
+        # Autocommit mode, transaction() issues BEGIN/COMMIT explicitly
+        self._conn = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, version INTEGER NOT NULL, value TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS log (name TEXT NOT NULL, seq INTEGER NOT NULL, key TEXT NOT NULL, "
+            "value TEXT NOT NULL, PRIMARY KEY (name, seq), UNIQUE (name, key))"
+        )
+        self._lock = threading.RLock()
+
+    def get(self, key: str) -> Tuple[int, Optional[Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT version, value FROM state WHERE key = ?", (key,)).fetchone()
+        return (row[0], json.loads(row[1])) if row else (0, None)
+
+    def version(self, key: str) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT version FROM state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else 0
+
+    @contextmanager
+    def transaction(self, key: str) -> Iterator[Dict]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT version, value FROM state WHERE key = ?", (key,)).fetchone()
+                version, data = row if row else (0, None)
+                document = json.loads(data) if data is not None else {}
+                yield document
+                new_data = json.dumps(document)
+                if new_data != data:
+                    self._conn.execute(
+                        "INSERT INTO state (key, version, value) VALUES (?, ?, ?) "
+                        "ON CONFLICT(key) DO UPDATE SET version = excluded.version, value = excluded.value",
+                        (key, version + 1, new_data),
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def append(self, log: str, entries: List[Tuple[str, Any]], keep: Optional[int] = None) -> int:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Trimming always keeps the newest entry, so numbers are never reused
+                (last_seq,) = self._conn.execute("SELECT MAX(seq) FROM log WHERE name = ?", (log,)).fetchone()
+                next_seq = (last_seq or 0) + 1
+                added = 0
+                for key, value in entries:
+                    inserted = self._conn.execute(
+                        "INSERT OR IGNORE INTO log (name, seq, key, value) VALUES (?, ?, ?, ?)",
+                        (log, next_seq, key, json.dumps(value)),
+                    ).rowcount
+                    next_seq += inserted
+                    added += inserted
+                if added and keep is not None:
+                    self._conn.execute("DELETE FROM log WHERE name = ? AND seq < ?", (log, next_seq - max(keep, 1)))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return added
+
+    def read_log(self, log: str, after: int = 0) -> List[Tuple[int, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, value FROM log WHERE name = ? AND seq > ? ORDER BY seq", (log, after)
+            ).fetchall()
+        return [(seq, json.loads(value)) for seq, value in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class CachedState:
+    """Reads documents through a cache, re-reading only after a version change"""
+
+    def __init__(self, store: StateStore):
+        self.store = store
+        self._cache: Dict[str, Tuple[int, Any]] = {}
+
+    def read(self, key: str) -> Tuple[int, Optional[Any]]:
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] == self.store.version(key):
+            return cached
+        self._cache[key] = self.store.get(key)
+        return self._cache[key]
+
+
+class SharedResponderPool(ResponderPool):
+    """
+    ResponderPool whose inventory and reservations live in a StateStore.
+
+    The first pool created on a store sets the capacity; later ones adopt it.
+    Holders are stored as strings. Wait queues stay per process, so waiters
+    re-check every ``poll_interval`` seconds for responders freed elsewhere,
+    and severity ordering holds among the waiters of one process.
+    """
+
+    def __init__(
+        self,
+        store: StateStore,
+        capacity: Optional[Dict[str, int]] = None,
+        key: str = "responders",
+        poll_interval: float = 0.5,
+    ):
+        super().__init__(capacity)
+        self.store = store
+        self.key = key
+        self.poll_interval = poll_interval
+        self._cache = CachedState(store)
+        with store.transaction(key) as state:
+            if not state:
+                state.update(capacity=self.capacity, available=self.capacity, holdings={})
+            self.capacity = dict(state["capacity"])
+
+    @contextmanager
+    def _locked(self):
+        with self._lock, self.store.transaction(self.key) as state:
+            self._available = Counter(state["available"])
+            self._holdings = {holder: Counter(held) for holder, held in state["holdings"].items()}
+            yield
+            state["available"] = {responder_type: count for responder_type, count in self._available.items() if count}
+            state["holdings"] = {holder: dict(held) for holder, held in self._holdings.items()}
+
+    def available(self, responder_type: Optional[str] = None) -> int:
+        _, state = self._cache.read(self.key)
+        if responder_type is None:
+            return sum(state["available"].values())
+        return state["available"].get(responder_type, 0)
+
+    def holdings(self, holder: Hashable) -> Dict[str, int]:
+        _, state = self._cache.read(self.key)
+        return dict(state["holdings"].get(str(holder), {}))
+
+    def try_reserve(self, holder: Hashable, responder_types: Iterable[str], severity: int = 0) -> bool:
+        return super().try_reserve(str(holder), responder_types, severity)
+
+    async def reserve(self, holder: Hashable, responder_types: Iterable[str], severity: int = 0, timeout=None) -> bool:
+        return await super().reserve(str(holder), responder_types, severity, timeout)
+
+    def release(self, holder: Hashable, responder_types: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        return super().release(str(holder), responder_types)
+
+
+class SharedTimeline:
+    """
+    Disaster events published to a StateStore, bounded to ``max_events``.
+
+    Events are numbered in publish order and deduplicated by headline, so
+    several workers may publish the same feed. They are kept as log entries,
+    so a publish writes only its batch. Readers pull what is newer than the
+    last sequence number they saw.
+    """
+
+    def __init__(self, store: StateStore, key: str = "events", max_events: int = 1000):
+        self.store = store
+        self.key = key
+        self.max_events = max_events
+
+    def publish(self, events: List[DisasterEvent], received_at: float) -> int:
+        """Append events not already published, returning how many were new"""
+        entries = [
+            (event.key, [received_at, event.time_label, event.title, event.headline, event.body]) for event in events
+        ]
+        return self.store.append(self.key, entries, keep=self.max_events)
+
+    def since(self, seq: int) -> List[Tuple[int, float, DisasterEvent]]:
+        """Published events with a sequence number above seq, oldest first"""
+        return [
+            (entry_seq, record[0], DisasterEvent(*record[1:])) for entry_seq, record in self.store.read_log(self.key, seq)
+        ]
+
+
+_timeline: Optional[SharedTimeline] = None
+
+
+def shared_timeline() -> Optional[SharedTimeline]:
+    """The timeline set up by use_shared_state(), if any"""
+    return _timeline
+
+
+def use_shared_state(store: StateStore, capacity: Optional[Dict[str, int]] = None, max_events: int = 1000):
+    """Keep responders and the disaster timeline of every AgentContext created from now on in store"""
+    global _timeline
+    set_shared_responder_pool(SharedResponderPool(store, capacity))
+    _timeline = SharedTimeline(store, max_events=max_events)
+
+
+def test_shared_state_across_stores():
+    """Two stores on one file behave like two worker processes"""
+    import asyncio
+    import os
+    import tempfile
+    import time
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "state.db")
+        first, second = SQLiteStateStore(path), SQLiteStateStore(path)
+        pool_a = SharedResponderPool(first, {"paramedic": 2})
+        pool_b = SharedResponderPool(second, {"paramedic": 5})
+        assert pool_b.capacity == {"paramedic": 2}
+
+        assert pool_a.try_reserve(1, ["paramedic"])
+        assert pool_b.try_reserve(2, ["paramedic"])
+        assert not pool_a.try_reserve(3, ["paramedic"])
+        assert pool_b.available() == 0
+
+        async def wait_for_release():
+            waiting = asyncio.create_task(pool_a.reserve(3, ["paramedic"], timeout=5))
+            await asyncio.sleep(0.05)
+            pool_b.release(2)
+            return await waiting
+
+        pool_a.poll_interval = 0.01
+        assert asyncio.run(wait_for_release())
+        assert pool_b.holdings(3) == {"paramedic": 1}
+
+        timeline_a, timeline_b = SharedTimeline(first), SharedTimeline(second)
+        event = DisasterEvent("08:00 PM", "Night", "Curfew Announced Downtown", "Body.")
+        assert timeline_a.publish([event], time.time()) == 1
+        assert timeline_b.publish([event], time.time()) == 0
+        assert [entry[2] for entry in timeline_b.since(0)] == [event]
+
+        # Only max_events are kept, and readers only get what is newer than what they saw
+        for store in (first, LocalStateStore()):
+            timeline = SharedTimeline(store, key="bounded", max_events=3)
+            batches = [
+                [DisasterEvent("09:00 PM", "Night", f"Update {i}", "Body.") for i in range(j, j + 2)] for j in (0, 2, 4)
+            ]
+            assert [timeline.publish(batch, time.time()) for batch in batches] == [2, 2, 2]
+            assert [entry[0] for entry in timeline.since(0)] == [4, 5, 6]
+            assert [entry[2].headline for entry in timeline.since(5)] == ["Update 5"]
+        first.close()
+        second.close()
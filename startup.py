@@ -0,0 +1,106 @@
+"""
+Startup helpers that keep telemetry and heavy imports off the critical path.
+
+Importing the agents SDK and agentops takes seconds, and agentops.init()
+talks to its backend before returning. A worker or CLI should not make a
+caller wait for either:
+
+- load_environment() loads the .env file first thing, before anything reads
+  the environment
+- start_telemetry() initializes agentops on a daemon thread, so turns that
+  start before it finishes are not recorded
+- main.py imports the agent graph only once the prompt is up, while the
+  caller types
+- import_times() runs `python -X importtime` on a module, for the
+  import_time benchmark in benchmarks.py that catches regressions
+
+Run `python startup.py main server` to see where a module's import time goes.
+"""
+
+import os
+import subprocess
+import sys
+import threading
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_environment():
+    """
+    Load the .env file into the environment
+
+    Call it synchronously at startup: the agents SDK reads OPENAI_API_KEY
+    when the first turn builds its client, whatever thread telemetry is on.
+    """
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+
+def init_telemetry():
+    # Imported here: agentops pulls in the whole openai client
+    import agentops
+
+    # Initialize the agentops module
+    AGENTOPS_API_KEY = os.getenv("AGENTOPS_API_KEY")
+    agentops.init(api_key=AGENTOPS_API_KEY)
+
+
+def start_telemetry() -> threading.Thread:
+    """
+    Initialize telemetry on a daemon thread
+
+    Start it after the agent graph is imported, so two threads never import
+    the same packages at once.
+    """
+
+    def run():
+        try:
+            init_telemetry()
+        except Exception as e:
+            print(f"[TELEMETRY] agentops init failed: {e}")
+
+    thread = threading.Thread(target=run, name="telemetry", daemon=True)
+    thread.start()
+    return thread
+
+
+def import_times(module: str) -> Dict[str, Tuple[int, int]]:
+    """
+    Import a module in a fresh interpreter with -X importtime
+
+    Args:
+        module: Module to import, e.g. "main"
+
+    Returns:
+        Dict[str, Tuple[int, int]]: (self, cumulative) microseconds by imported module
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in completed.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def report(module: str, top: int = 10) -> List[str]:
+    times = import_times(module)
+    lines = [f"{module}: {times[module][1] / 1000:.0f} ms"]
+    for name, (self_us, _) in sorted(times.items(), key=lambda item: item[1][0], reverse=True)[:top]:
+        lines.append(f"  {self_us / 1000:7.1f} ms  {name}")
+    return lines
+
+
+if __name__ == "__main__":
+    for module in sys.argv[1:] or ["main"]:
+        print("\n".join(report(module)))
@@ -0,0 +1,261 @@
+"""
+Local, non-blocking export of the agents SDK traces.
+
+The SDK hands every finished trace and span to its trace processors on the
+thread running the turn. BatchSpanExporter only appends the exported record
+to a bounded in-memory queue there; a background thread writes batches to
+the sinks, e.g. an NDJSONFileSink. When the sinks fall behind:
+
+- past ``sample_above`` of the queue, only ``sample_rate`` of the spans are
+  kept (traces always are)
+- with the queue full, ``overflow`` decides: "drop_new" drops the incoming
+  record, "drop_oldest" makes room by dropping the oldest queued one
+
+Either way a turn never waits for telemetry, and memory stays bounded.
+Dropped and sampled-out records and the queue depth are counted in
+``stats``, and in a MetricsRegistry when one is given. Set it up at startup
+with use_local_telemetry(), which replaces the SDK's exporter to the OpenAI
+backend, so traces never leave the machine.
+"""
+
+import atexit
+import json
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, List, Optional
+
+from agents.tracing import Span, Trace, TracingProcessor, set_trace_processors
+
+
+class NDJSONFileSink:
+    """Appends records to a file, one JSON document per line"""
+
+    def __init__(self, path: str = "telemetry.ndjson"):
+        self.path = path
+        self._file = open(path, "a")
+
+    def write(self, records: List[Dict[str, Any]]):
+        self._file.write("".join(json.dumps(record, default=str) + "\n" for record in records))
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+@dataclass
+class TelemetryStats:
+    enqueued: int = 0
+    exported: int = 0
+    dropped: int = 0
+    sampled_out: int = 0
+    export_errors: int = 0
+    batches: int = 0
+    queue_depth: int = 0
+    max_queue_depth: int = 0
+
+
+class BatchSpanExporter(TracingProcessor):
+    """
+    Trace processor that queues records and writes them from a background thread.
+
+    Args:
+        sinks: Objects with write(records) and close(), e.g. NDJSONFileSink
+        max_queue: Records held in memory at most
+        batch_size: Records written per batch at most
+        flush_interval: Seconds between writes when batches do not fill up
+        overflow: "drop_new" or "drop_oldest" when the queue is full
+        sample_above: Queue fill ratio from which spans are sampled
+        sample_rate: Fraction of spans kept while sampling
+        registry: Optional MetricsRegistry for the drop counters and queue depth
+    """
+
+    def __init__(
+        self,
+        sinks: List[Any],
+        max_queue: int = 10_000,
+        batch_size: int = 256,
+        flush_interval: float = 2.0,
+        overflow: str = "drop_new",
+        sample_above: float = 0.5,
+        sample_rate: float = 0.1,
+        registry=None,
+    ):
+        if overflow not in ("drop_new", "drop_oldest"):
+            raise ValueError(f"Unknown overflow policy {overflow!r}")
+        self.sinks = sinks
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.sample_above = sample_above
+        self.sample_rate = sample_rate
+        self.registry = registry
+        self.stats = TelemetryStats()
+        self._queue: Deque[Dict[str, Any]] = deque()
+        self._lock = threading.Lock()
+        # Held while writing, so the background thread and force_flush() do not interleave
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._random = random.Random()
+        self._thread = threading.Thread(target=self._run, name="telemetry-export", daemon=True)
+        self._thread.start()
+
+    def _enqueue(self, record: Optional[Dict[str, Any]], is_span: bool):
+        if record is None or self._stopped.is_set():
+            return
+        with self._lock:
+            depth = len(self._queue)
+            if is_span and depth >= self.sample_above * self.max_queue and self._random.random() >= self.sample_rate:
+                self.stats.sampled_out += 1
+                return
+            if depth >= self.max_queue:
+                self.stats.dropped += 1
+                if self.overflow == "drop_new":
+                    return
+                self._queue.popleft()
+            self._queue.append(record)
+            self.stats.enqueued += 1
+            self.stats.queue_depth = len(self._queue)
+            self.stats.max_queue_depth = max(self.stats.max_queue_depth, self.stats.queue_depth)
+            full_batch = self.stats.queue_depth >= self.batch_size
+        if full_batch:
+            self._wakeup.set()
+
+    def on_trace_start(self, trace: Trace) -> None:
+        pass
+
+    def on_trace_end(self, trace: Trace) -> None:
+        self._enqueue(trace.export(), is_span=False)
+
+    def on_span_start(self, span: Span[Any]) -> None:
+        pass
+
+    def on_span_end(self, span: Span[Any]) -> None:
+        self._enqueue(span.export(), is_span=True)
+
+    def _take_batch(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+            self.stats.queue_depth = len(self._queue)
+        return batch
+
+    def _export(self, batch: List[Dict[str, Any]]):
+        for sink in self.sinks:
+            try:
+                sink.write(batch)
+            except Exception as e:
+                self.stats.export_errors += 1
+                print(f"[TELEMETRY] {sink.__class__.__name__} failed: {e}")
+        self.stats.exported += len(batch)
+        self.stats.batches += 1
+
+    def _report(self, last: TelemetryStats):
+        if self.registry is None:
+            return
+        for name in ("exported", "dropped", "sampled_out", "export_errors"):
+            delta = getattr(self.stats, name) - getattr(last, name)
+            if delta:
+                self.registry.increment(f"telemetry_{name}", delta)
+        self.registry.observe("telemetry_queue_depth", self.stats.queue_depth, buckets=(0, 16, 64, 256, 1024, 4096, 16384))
+
+    def _flush(self):
+        with self._flush_lock:
+            last = TelemetryStats(**vars(self.stats))
+            while True:
+                batch = self._take_batch()
+                if not batch:
+                    break
+                self._export(batch)
+            self._report(last)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self._flush()
+
+    def force_flush(self) -> None:
+        self._flush()
+
+    def shutdown(self, timeout: Optional[float] = 5.0) -> None:
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        self._wakeup.set()
+        self._thread.join(timeout)
+        self._flush()
+        for sink in self.sinks:
+            sink.close()
+
+
+def use_local_telemetry(path: str = "telemetry.ndjson", registry=None, **kwargs) -> BatchSpanExporter:
+    """
+    Send the SDK's traces only to an NDJSON file, through a BatchSpanExporter
+
+    Args:
+        path: File the traces and spans are appended to
+        registry: Optional MetricsRegistry for the exporter's counters
+        **kwargs: Passed to BatchSpanExporter
+
+    Returns:
+        BatchSpanExporter: The installed exporter, flushed and closed on exit
+    """
+    exporter = BatchSpanExporter([NDJSONFileSink(path)], registry=registry, **kwargs)
+    set_trace_processors([exporter])
+    atexit.register(exporter.shutdown)
+    return exporter
+
+
+def test_batch_span_exporter():
+    import os
+    import tempfile
+
+    from agents import custom_span, trace
+
+    class SlowSink:
+        def __init__(self):
+            self.records = []
+
+        def write(self, records):
+            time.sleep(0.05)
+            self.records.extend(records)
+
+        def close(self):
+            pass
+
+    sink = SlowSink()
+    exporter = BatchSpanExporter(
+        [sink], max_queue=50, batch_size=10, flush_interval=0.01, overflow="drop_oldest", sample_above=0.8
+    )
+    set_trace_processors([exporter])
+    try:
+        start = time.perf_counter()
+        with trace("Load"):
+            for i in range(500):
+                with custom_span(f"span {i}"):
+                    pass
+        # Queueing is all the caller pays for, however slow the sink
+        assert time.perf_counter() - start < 0.5
+        exporter.shutdown()
+        stats = exporter.stats
+        assert stats.max_queue_depth <= 50
+        assert stats.dropped + stats.sampled_out > 0
+        assert stats.exported == len(sink.records) == stats.enqueued - stats.dropped
+        # The trace ended last, so dropping the oldest records kept it
+        assert sink.records[-1]["object"] == "trace"
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "telemetry.ndjson")
+            local = use_local_telemetry(path, flush_interval=0.01)
+            with trace("Local"):
+                with custom_span("span"):
+                    pass
+            local.shutdown()
+            with open(path) as f:
+                assert [json.loads(line)["object"] for line in f] == ["trace.span", "trace"]
+    finally:
+        set_trace_processors([])